@@ -1,38 +1,151 @@
-from src.ingestion_pipeline import IngestionPipeline
 from dotenv import load_dotenv
 import os
+import re
+import sys
+import mmap
 import json
+import string
+import time
 from datetime import datetime, timedelta, date
 import requests
-from prompt_toolkit import prompt
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from prompt_toolkit import PromptSession
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.formatted_text import HTML
-from src.graph_manager import GraphManager
 from src.tracking_manager import TrackingManager
-from scripts.experiment_manager import ExperimentManager
-from src.context_manager import ContextManager
-from src.skill_loader import SkillLoader
+from src.context_manager import ContextManager, ConversationWindow
+from src.llm_cache import LLMCache
+from src import json_utils
+
+try:
+    import tiktoken
+except ImportError:  # Optional: token counts are estimated from length without it
+    tiktoken = None
 
 # --- CONFIGURATION ---
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY") #in the .evn file, it will be invisible when looking at the folder.
 #The api_key value and its key need to be entered without ""
 DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"  # Set LLM_CACHE=0 to always call the API
+LLM_WARM_CACHE = os.getenv("LLM_WARM_CACHE", "0") == "1"  # Set to 1 to warm the prompt cache while the user types
+INTERACTIVE_GROUNDING = os.getenv("INTERACTIVE_GROUNDING", "1") == "1"  # Set to 0 for timed grounding steps
+
+# One keep-alive session for all API calls so each turn reuses the TLS
+# connection; the pool is sized for _call_llm_batch's worker count
+_SESSION = requests.Session()
+_SESSION.headers.update({"Authorization": f"Bearer {DEEPSEEK_API_KEY}"})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Retries for timeouts, dropped connections, rate limits and server errors.
+# Backoff doubles from LLM_BACKOFF_SECONDS, capped at LLM_BACKOFF_MAX_SECONDS.
+LLM_MAX_RETRIES = 2
+LLM_BACKOFF_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 8.0
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Per-call latency/token log (data/llm_calls.jsonl), rotated to .1 past this size
+LLM_LOG_MAX_BYTES = 1_000_000
+
+# Daily entry manifest, stored as parallel arrays (one list per field)
+ENTRY_INDEX_FIELDS = ("filename", "mtime", "summary", "takeaway")
+MTIME_TOLERANCE = 0.01  # Seconds; absorbs float rounding when comparing file mtimes
+
+# Matches the first ```json ... ``` or ``` ... ``` block anywhere in a response
+# (replies often wrap it in prose), including single-line fences
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+def _strip_fence(text):
+    """Return the body of the first markdown code fence in a JSON response."""
+    if '```' not in text:
+        return text.strip()  # Unfenced: skip the regex
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text.strip()
+
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+def _loosen_json(text):
+    """Best-effort repair: cut to the outermost {...} or [...] and drop trailing commas."""
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind('}' if text[start] == '{' else ']')
+        if end > start:
+            text = text[start:end + 1]
+    return _TRAILING_COMMA_RE.sub(r'\1', text)
+
+@lru_cache(maxsize=256)
+def _parse_llm_json(raw):
+    """
+    Parse a (possibly fenced) JSON response, retrying once with
+    `_loosen_json` so stray prose or trailing commas don't cost another LLM
+    call. Memoized by response text, since cached and retried LLM replies
+    repeat; parse errors propagate and are not cached. The result is shared
+    between callers, so treat it as read-only.
+    """
+    text = _strip_fence(raw)
+    try:
+        return json_utils.loads(text)
+    except ValueError:
+        return json_utils.loads(_loosen_json(text))
+
+# Single-word commands accepted at the chat prompt
+_SESSION_COMMANDS = frozenset({"SAVE", "DONE", "EXIT", "FINALIZE"})
+_MAX_COMMAND_LEN = max(len(cmd) for cmd in _SESSION_COMMANDS)
+
+def _session_command(text):
+    """
+    Return the command in `text` (upper-cased) or None. The length check
+    comes first so long pasted inputs are never upper-cased.
+    """
+    text = text.strip()
+    if len(text) > _MAX_COMMAND_LEN:
+        return None
+    cmd = text.upper()
+    return cmd if cmd in _SESSION_COMMANDS else None
+
+def _post_llm(payload, timeout, max_retries=LLM_MAX_RETRIES):
+    """
+    POST a chat completion, retrying transient failures with exponential
+    backoff. `timeout` bounds each connect/read wait, so one stalled request
+    is cut off and retried instead of blocking the session. Streamed bodies
+    are not retried once returned, since tokens may already be printed.
+    """
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(min(LLM_BACKOFF_SECONDS * 2 ** (attempt - 1), LLM_BACKOFF_MAX_SECONDS))
+        try:
+            response = _SESSION.post(DEEPSEEK_API_URL, json=payload, timeout=timeout,
+                                     stream=payload.get("stream", False))
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            continue
+        if response.status_code in _RETRYABLE_STATUS and attempt < max_retries:
+            response.close()
+            continue
+        response.raise_for_status()
+        return response
+
+def _send_warmup(payload):
+    """POST a prompt cache warm-up request; failures only mean a colder cache."""
+    try:
+        _SESSION.post(DEEPSEEK_API_URL, json=payload, timeout=30).close()
+    except requests.RequestException:
+        pass
+
+# Vent & Reframe tension bars, indexed by level (0-5)
+_TENSION_BARS = tuple('█' * i + '░' * (5 - i) for i in range(6))
 
 # --- PROMPTS ---
 
+# Static instructions go first and per-turn context last: DeepSeek caches
+# prompts by prefix, so a stable system prompt + history is reused every turn.
 DAILY_GUIDANCE_PROMPT = """
 You are a reflective coach who helps people process experiences with patience and depth.
 
-Current Stage: {current_step}
-
-{hierarchical_context}
-
-RELEVANT CONTEXT FROM PAST REFLECTIONS:
-{graph_context}
-
-{stage_rules}
-
 CORE PRINCIPLES:
 1. Ask ONE question at a time. Wait for full response.
 2. Encourage depth before moving to abstraction ("Take your time", "Tell me more").
@@ -40,8 +153,19 @@ CORE PRINCIPLES:
 4. Never stack multiple theoretical frameworks in one response.
 5. Validate insights before deepening.
 6. Be curious and empathetic, not prescriptive.
+"""
+
+DAILY_CONTEXT_PROMPT = """
+Current Stage: {current_step}
+
+{stage_rules}
 
 {experiment_context}
+
+{hierarchical_context}
+
+RELEVANT CONTEXT FROM PAST REFLECTIONS:
+{graph_context}
 """
 
 DAILY_SUMMARY_PROMPT = """
@@ -57,19 +181,54 @@ Analyze the *entire* conversation. Output ONLY a JSON object with this schema:
 }
 """
 
+# Keys of the DAILY_SUMMARY_PROMPT schema, in prompt order
+DAILY_SUMMARY_FIELDS = (
+    "summary", "trigger_cues", "emotional_response", "cognitive_pattern",
+    "behavioral_action", "proposed_solution", "key_takeaway"
+)
+
 WEEKLY_SYSTEM_PROMPT = """
 You are a performance coach. The user is reviewing their week.
+
+Goal: Help the user identify themes and connect them to last week's progress. 
+Ask exactly two insightful, connected questions at a time.
+
 CONTEXT FROM LAST WEEK'S SUMMARY: 
 {prev_context}
 
 CURRENT WEEK'S DATA:
 {current_data}
+"""
 
+WEEKLY_CONTEXT_PROMPT = """
 RELEVANT PATTERNS FROM PAST REFLECTIONS:
 {graph_context}
+"""
 
-Goal: Help the user identify themes and connect them to last week's progress. 
-Ask exactly two insightful, connected questions at a time.
+# Token budget for the weekly system prompt (instructions + last week + this week).
+# cl100k_base only approximates DeepSeek's tokenizer, which is enough for budgeting.
+WEEKLY_PROMPT_TOKEN_BUDGET = 8000
+_TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base") if tiktoken else None
+
+def _count_tokens(text):
+    """Approximate token count (about 4 characters per token without tiktoken)."""
+    if _TOKEN_ENCODING:
+        return len(_TOKEN_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+def _truncate_to_tokens(text, budget):
+    """Cut text to at most `budget` tokens, on token (not byte) boundaries."""
+    if _TOKEN_ENCODING:
+        tokens = _TOKEN_ENCODING.encode(text)
+        return text if len(tokens) <= budget else _TOKEN_ENCODING.decode(tokens[:budget])
+    return text[:budget * 4]
+
+_WEEKLY_STATIC_TOKENS = _count_tokens(WEEKLY_SYSTEM_PROMPT)
+
+ENTRY_SUMMARY_PROMPT = """
+Summarize this daily reflection entry for a weekly review.
+In one or two sentences on a single line, cover: the situation, the main emotion and thought pattern,
+what the user decided to try, and the key takeaway. Output ONLY the summary.
 """
 
 WEEKLY_SUMMARY_PROMPT = """
@@ -96,12 +255,37 @@ If found, output a JSON object with this schema. If no experiment found, output
     "habit_area": "General area this relates to (e.g. 'emotional regulation', 'morning routine')"
 }
 """
+
+DAILY_TAIL_PROMPT = """
+Analyze the *entire* conversation. Output ONLY a JSON object with this schema:
+{
+  "summary": {
+    "summary": "Concise one-sentence summary.",
+    "trigger_cues": "Physical or environmental trigger.",
+    "emotional_response": "Primary feeling before action.",
+    "cognitive_pattern": "Core thought process or story.",
+    "behavioral_action": "Action taken.",
+    "proposed_solution": "Final proposed experiment/solution.",
+    "key_takeaway": "Main lesson learned."
+  },
+  "experiment": {
+    "experiment_found": true,
+    "title": "Short descriptive name (e.g. '4-7-8 breathing + music')",
+    "description": "Full details of what the user will try",
+    "success_criteria": "How the user will know it worked",
+    "habit_area": "General area this relates to (e.g. 'emotional regulation', 'morning routine')"
+  }
+}
+If the user did not commit to an experiment or action plan, set "experiment" to {"experiment_found": false}.
+"""
+
+# The goal goes last in both habit prompts so the instructions form a prefix
+# shared by every goal. DeepSeek bills cached prefix tokens at a fraction of
+# the normal input price and charges nothing extra to write the cache, so
+# there is no break-even to reach: any repeat of the prefix is cheaper.
 HABIT_DEVELOPMENT_PROMPT = """
 You are a performance coach helping someone break down a life goal into actionable habits.
 
-GOAL: {goal_title}
-DESCRIPTION: {goal_description}
-
 Your role is to have a collaborative conversation to:
 1. Understand their vision deeply
 2. Identify what habits a person who achieved this goal would have
@@ -117,6 +301,30 @@ When the user says 'DONE' or 'FINALIZE', output a final summary as JSON array:
 ```
 
 Start by acknowledging their goal and asking 1-2 questions to understand it better.
+
+GOAL: {goal_title}
+DESCRIPTION: {goal_description}
+"""
+
+HABIT_REFINEMENT_PROMPT = """
+You are a performance coach helping refine habits for a goal.
+
+Your role:
+- Help add new habits or refine existing ones
+- Identify gaps in the current habit structure
+- Suggest component skills for each habit
+- Be collaborative and build on the user's ideas
+
+When user says 'DONE', end your reply with the final NEW habits as JSON,
+with nothing after the block:
+```json
+[{{"title": "Habit", "description": "...", "components": ["..."]}}]
+```
+
+GOAL: {goal_title}
+DESCRIPTION: {goal_description}
+
+{habits_context}
 """
 
 # --- VENT & REFRAME PROMPTS ---
@@ -184,6 +392,66 @@ Respond with ONLY a JSON object:
 }}
 """
 
+VENT_COMBINED_PROMPT = """
+You are an emotional intelligence coach analyzing frustration to understand underlying needs.
+
+Vent text:
+{vent_text}
+
+Work through three steps:
+1. DECODE: Identify the UNDERLYING NEED that isn't being met (be specific and descriptive), its CATEGORY
+   (examples: clarity, progress, connection, recognition, autonomy, competence, safety, fairness - but use
+   your judgment, don't force into these), the TRIGGER patterns that activated this frustration, and the
+   CORE UNMET NEED in one phrase.
+2. REFRAME: Generate ONE constructive question that shifts focus from frustration to actionable clarity,
+   directly addresses the unmet need, and can be answered with a specific, concrete action.
+3. ACTION: Based on the reframe question, suggest ONE concrete micro-action that is completable in
+   5 minutes or less, concrete and specific (not vague), and a genuine step toward the underlying need.
+
+Respond with ONLY a JSON object:
+{{
+    "decode": {{
+        "underlying_need": "Detailed description of what the person actually needs",
+        "need_category": "Short label for the type of need (your best judgment)",
+        "triggers": ["List of trigger patterns identified"],
+        "unmet_need_summary": "One phrase capturing the core unmet need",
+        "key_phrases": ["Phrases from the vent that reveal the need"],
+        "confidence": 0.0-1.0,
+        "brief_analysis": "One sentence explaining your interpretation"
+    }},
+    "reframe": {{
+        "reframe_question": "The constructive question to ask themselves",
+        "why_this_helps": "How this addresses the underlying need"
+    }},
+    "action": {{
+        "micro_action": "Specific action to take right now",
+        "time_estimate": "X minutes",
+        "expected_outcome": "How this helps meet the underlying need"
+    }}
+}}
+"""
+
+# --- COMPILED TEMPLATES ---
+
+def _compile_template(template):
+    """Split a str.format template into (literal, field) pairs once, at import."""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+def _render_template(parts, **values):
+    """Fill a compiled template; equivalent to template.format(**values) for plain fields."""
+    return "".join(literal + (str(values[field]) if field else "") for literal, field in parts)
+
+# Templates are parsed once here instead of on every render
+_DAILY_CONTEXT_PARTS = _compile_template(DAILY_CONTEXT_PROMPT)
+_WEEKLY_CONTEXT_PARTS = _compile_template(WEEKLY_CONTEXT_PROMPT)
+_WEEKLY_SYSTEM_PARTS = _compile_template(WEEKLY_SYSTEM_PROMPT)
+_HABIT_DEVELOPMENT_PARTS = _compile_template(HABIT_DEVELOPMENT_PROMPT)
+_HABIT_REFINEMENT_PARTS = _compile_template(HABIT_REFINEMENT_PROMPT)
+_VENT_DECODE_PARTS = _compile_template(VENT_DECODE_PROMPT)
+_VENT_REFRAME_PARTS = _compile_template(VENT_REFRAME_PROMPT)
+_VENT_MICRO_ACTION_PARTS = _compile_template(VENT_MICRO_ACTION_PROMPT)
+_VENT_COMBINED_PARTS = _compile_template(VENT_COMBINED_PROMPT)
+
 # --- CLASS DEFINITION ---
 
 class ReflectionCoach:
@@ -194,29 +462,35 @@ class ReflectionCoach:
         self.daily_dir = os.path.join(self.data_dir, "conversation_history", "daily")
         self.weekly_dir = os.path.join(self.data_dir, "conversation_history", "weekly")
         self.context_file = os.path.join(self.weekly_dir, "context_memory.json")
+        self.entry_index_file = os.path.join(self.weekly_dir, "index.json")
+        self.llm_log_file = os.path.join(self.data_dir, "llm_calls.jsonl")
         
         # Ensure directories exist
         os.makedirs(self.daily_dir, exist_ok=True)
         os.makedirs(self.weekly_dir, exist_ok=True)
-
-        # Initialize Graph Components
-        self.graph_manager = GraphManager(os.path.join(self.data_dir, "reflection_graph.json"))
-        self.ingestion_pipeline = IngestionPipeline(self.graph_manager)
         
-        # Initialize Tracking and Context Managers
+        # Manifest of daily entries so the weekly review doesn't re-read every file
+        self._entry_index = self._load_entry_index()
+
+        # Graph, ingestion, experiment, context and skill components are
+        # created on first use (see the properties below), so menus that
+        # don't need them skip loading the graph and their imports.
         self.tracking_manager = TrackingManager(self.script_dir)
-        self.experiment_manager = ExperimentManager() # Uses tracking_manager internally but we can re-instantiate or share if needed.
-        # ExperimentManager currently instantiates its own TrackingManager. 
-        # Ideally we share instances, but since JSONL is the source of truth, separate instances are fine for now.
         
-        self.context_manager = ContextManager(
-            base_dir=self.script_dir,
-            graph_manager=self.graph_manager,
-            tracking_manager=self.tracking_manager
-        )
+        # On-disk cache of LLM responses (exact + optional semantic matches)
+        self.llm_cache = LLMCache(os.path.join(self.data_dir, "llm_cache.sqlite")) if LLM_CACHE_ENABLED else None
+        
+        # Single background writer so saving entries never blocks the session;
+        # one worker keeps writes in submission order
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+        # Background LLM calls (history summaries, prompt cache warm-ups),
+        # kept off the turn loop
+        self._llm_pool = ThreadPoolExecutor(max_workers=1)
+        self._graph_context_cache = {}  # text -> ego_walk context, cleared on ingestion
+        self._vent_exp_id = None  # Last active Vent & Reframe experiment found
+        self._habits_context_cache = {}  # goal id -> (habit fields, rendered context)
+        self._llm_latencies = []  # latency_ms of every _call_llm this run
         
-        # Initialize Skill Loader for YAML-based behavior
-        self.skill_loader = SkillLoader(os.path.join(self.script_dir, "skills"))
         self.current_stage = "experience"  # Track Kolb stage
 
         # Key Bindings for Multi-line Input
@@ -227,38 +501,83 @@ class ReflectionCoach:
             """Submit input when Esc then Enter is pressed."""
             event.app.exit(event.app.current_buffer.text)
 
+        # Prompt session and styled labels are reused across turns
+        self._prompt_session = None  # Created on first input (needs a terminal)
+        self._label_cache = {}
+
+    # --- Lazily created components ---
+
+    @cached_property
+    def graph_manager(self):
+        from src.graph_manager import GraphManager
+        return GraphManager(os.path.join(self.data_dir, "reflection_graph.json"))
+
+    @cached_property
+    def ingestion_pipeline(self):
+        from src.ingestion_pipeline import IngestionPipeline
+        return IngestionPipeline(self.graph_manager)
+
+    @cached_property
+    def experiment_manager(self):
+        from scripts.experiment_manager import ExperimentManager
+        return ExperimentManager(tracking_manager=self.tracking_manager)
+
+    @cached_property
+    def context_manager(self):
+        return ContextManager(
+            base_dir=self.script_dir,
+            graph_manager=self.graph_manager,
+            tracking_manager=self.tracking_manager
+        )
+
+    @cached_property
+    def skill_loader(self):
+        """YAML-based behavior config."""
+        from src.skill_loader import SkillLoader
+        return SkillLoader(os.path.join(self.script_dir, "skills"))
+
     def _get_multiline_input(self, label="You"):
         """
         Uses prompt_toolkit to allow multi-line input.
         User presses Esc, then Enter to submit.
         """
         print(f"\n--- {label} (Type away! Press 'Esc' then 'Enter' to send) ---")
-        style = HTML(f'<style fg="#ansigreen">{label}: </style>')
-        
-        user_text = prompt(
-            style, 
-            multiline=True, 
-            key_bindings=self.kb,
-            bottom_toolbar=HTML(" <b>[Esc] + [Enter]</b> to submit | <b>Type 'DONE' or 'SAVE'</b> (alone on line) to finish.")
-        )
+        style = self._label_cache.get(label)
+        if style is None:
+            style = self._label_cache[label] = HTML(f'<style fg="#ansigreen">{label}: </style>')
+        
+        if self._prompt_session is None:
+            self._prompt_session = PromptSession(
+                multiline=True, 
+                key_bindings=self.kb,
+                bottom_toolbar=HTML(" <b>[Esc] + [Enter]</b> to submit | <b>Type 'DONE' or 'SAVE'</b> (alone on line) to finish.")
+            )
+        user_text = self._prompt_session.prompt(style)
         return user_text.strip()
 
-    def _strip_markdown_json(self, text):
-        """Strip markdown code blocks from JSON responses"""
-        import re
-        # Remove ```json ... ``` or ``` ... ``` blocks
-        text = text.strip()
-        if text.startswith('```'):
-            # Find the first newline after opening ```
-            first_newline = text.find('\n')
-            # Find the closing ```
-            last_backticks = text.rfind('```')
-            if first_newline != -1 and last_backticks != -1:
-                text = text[first_newline+1:last_backticks].strip()
-        return text
-    
-    def _call_llm(self, system_prompt, user_prompt, history=None):
-        """Standardized LLM Call"""
+    def _call_llm(self, system_prompt, user_prompt, history=None, context=None, stream=False, timeout=120,
+                  semantic=False):
+        """
+        Standardized LLM Call.
+
+        `context` is per-turn dynamic context. It is sent as a separate system
+        message right before the user turn, so the static system prompt and the
+        history stay a byte-identical prefix for DeepSeek's prompt cache.
+
+        With `stream=True` the reply is printed token by token as it arrives
+        and the full text is still returned.
+
+        `timeout` bounds each network wait; transient failures are retried
+        with backoff (see `_post_llm`).
+
+        Responses are served from `self.llm_cache` when an identical request
+        was seen, unless the cache is disabled with LLM_CACHE=0. Near-identical
+        matches are only used with `semantic=True` (and sentence-transformers
+        installed); pass it for conversational replies only, never for
+        summaries or JSON extractions, which must match their exact input.
+
+        Every call's latency and token usage is appended to `llm_log_file`.
+        """
         if not DEEPSEEK_API_KEY or DEEPSEEK_API_KEY == "NA_For_now":
             print("Error: DEEPSEEK_API_KEY not set.")
             return "Error: API_KEY not set."
@@ -266,34 +585,198 @@ class ReflectionCoach:
         messages = [{"role": "system", "content": system_prompt}]
         if history:
             messages.extend(history)
+        if context:
+            messages.append({"role": "system", "content": context})
         messages.append({"role": "user", "content": user_prompt})
 
         payload = {
             "model": "deepseek-chat", 
             "messages": messages,
-            "temperature": 0.7
+            "temperature": 0.7,
+            "stream": stream
         }
+        if stream:
+            # Ask for a final usage chunk so streamed calls are logged with tokens
+            payload["stream_options"] = {"include_usage": True}
+
+        started = time.perf_counter()
+        cached = (self.llm_cache.get(messages, temperature=payload["temperature"], semantic=semantic)
+                  if self.llm_cache else None)
+        if cached is not None:
+            if stream:
+                print(cached)
+            self._record_llm_call(started, "cache")
+            return cached
 
         try:
-            response = requests.post(DEEPSEEK_API_URL, headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"}, json=payload, timeout=120)
-            response.raise_for_status()
-            return response.json()['choices'][0]['message']['content']
+            response = _post_llm(payload, timeout)
+            if stream:
+                content, usage = self._print_stream(response)
+            else:
+                data = json_utils.loads(response.content)
+                content, usage = data['choices'][0]['message']['content'], data.get('usage')
         except Exception as e:
             print(f"LLM Error: {e}")
+            self._record_llm_call(started, "error")
             return "Error: LLM failed."
+        self._record_llm_call(started, "stream" if stream else "api", usage)
+
+        if self.llm_cache:
+            self.llm_cache.put(messages, content, semantic=semantic)
+        return content
+
+    def _record_llm_call(self, started, source, usage=None):
+        """
+        Log one `_call_llm` as a JSONL record: source (api/stream/cache/error),
+        latency_ms and DeepSeek's token counts. The append runs on `_io_pool`.
+        """
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self._llm_latencies.append(latency_ms)
+        usage = usage or {}
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "name": "llm",
+            "source": source,
+            "latency_ms": latency_ms,
+            "input_tokens": usage.get("prompt_tokens"),
+            "output_tokens": usage.get("completion_tokens"),
+            "cached_input_tokens": usage.get("prompt_cache_hit_tokens"),
+        }
+        self._io_pool.submit(self._append_llm_log, json_utils.dumps(record) + "\n")
+
+    def _append_llm_log(self, line):
+        """Append a record to the LLM call log, rotating it once it grows past LLM_LOG_MAX_BYTES."""
+        try:
+            if os.path.exists(self.llm_log_file) and os.path.getsize(self.llm_log_file) > LLM_LOG_MAX_BYTES:
+                os.replace(self.llm_log_file, self.llm_log_file + ".1")
+            with open(self.llm_log_file, "a", encoding="utf-8") as f:
+                f.write(line)
+        except IOError as e:
+            print(f"\nWrite Error ({self.llm_log_file}): {e}")
+
+    def llm_stats_summary(self):
+        """One-line latency summary of this run's LLM calls, or None if there were none."""
+        if not self._llm_latencies:
+            return None
+        latencies = sorted(self._llm_latencies)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return (f"LLM calls: {len(latencies)} | p50 {p50:.0f} ms | p95 {p95:.0f} ms"
+                f" | total {sum(latencies) / 1000:.1f} s")
+
+    def _warm_prompt_cache(self, system_prompt, history):
+        """
+        With LLM_WARM_CACHE=1, send the conversation so far with max_tokens=1
+        on `_llm_pool` and discard the reply. DeepSeek caches the request prefix,
+        so the next real turn's prefill (including the reply the user is
+        reading) is a cache hit.
+        """
+        if not LLM_WARM_CACHE or not DEEPSEEK_API_KEY or DEEPSEEK_API_KEY == "NA_For_now":
+            return
+        payload = {
+            "model": "deepseek-chat",
+            "messages": [{"role": "system", "content": system_prompt}, *history,
+                         {"role": "user", "content": "."}],
+            "max_tokens": 1
+        }
+        self._llm_pool.submit(_send_warmup, payload)
+
+    def _call_llm_batch(self, calls, max_workers=8):
+        """
+        Run independent (system_prompt, user_prompt) calls concurrently.
+        The calls are network-bound, so wall time is roughly the slowest call
+        rather than the sum. Results are returned in input order.
+        """
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+            return list(pool.map(lambda call: self._call_llm(*call), calls))
+
+    def _print_stream(self, response):
+        """
+        Print a server-sent-events completion as it arrives.
+        Returns (full text, usage); usage comes from the final chunk, if sent.
+        """
+        chunks = []
+        usage = None
+        for line in response.iter_lines():
+            # Skip blank separators and ": keep-alive" comments
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                continue  # Read to the end so the connection returns to the pool
+            event = json_utils.loads(data)
+            usage = event.get('usage') or usage
+            if not event.get('choices'):
+                continue  # The usage chunk has no choices
+            delta = event['choices'][0].get('delta', {}).get('content')
+            if delta:
+                print(delta, end="", flush=True)
+                chunks.append(delta)
+        print()
+        return "".join(chunks), usage
+
+    def _parse_daily_summary(self, summary_raw):
+        """
+        Parse the DAILY_SUMMARY_PROMPT response into a dict holding only the
+        schema's keys. Raises ValueError if the response is not a JSON object.
+        """
+        data = _parse_llm_json(summary_raw)
+        if not isinstance(data, dict):
+            raise ValueError("Daily summary is not a JSON object")
+        return {key: data[key] for key in DAILY_SUMMARY_FIELDS if key in data}
+
+    def _parse_daily_tail(self, tail_raw):
+        """
+        Parse the DAILY_TAIL_PROMPT response into (summary, experiment) dicts.
+        Raises ValueError if either part is missing or not a JSON object.
+        """
+        data = _parse_llm_json(tail_raw)
+        if not isinstance(data, dict):
+            raise ValueError("Daily tail is not a JSON object")
+        summary, experiment = data.get("summary"), data.get("experiment")
+        if not isinstance(summary, dict) or not isinstance(experiment, dict):
+            raise ValueError("Daily tail is missing 'summary' or 'experiment'")
+        return {key: summary[key] for key in DAILY_SUMMARY_FIELDS if key in summary}, experiment
+
+    def _find_vent_experiment(self):
+        """
+        Active experiment the Vent & Reframe protocol logs to (title mentions
+        vent or reframe), or None. The last match is checked by id first.
+        """
+        exp = self.tracking_manager.get_experiment(self._vent_exp_id) if self._vent_exp_id else None
+        if exp is None or exp.status not in ("active", "testing"):
+            experiments = self.tracking_manager.get_active_experiments()
+            exp = next((e for e in experiments if 'vent' in e.title.lower() or 'reframe' in e.title.lower()), None)
+            self._vent_exp_id = exp.id if exp else None
+        return exp
+
+    def _parse_vent_combined(self, combined_raw):
+        """
+        Parse the VENT_COMBINED_PROMPT response into (decode, reframe, action)
+        dicts. Raises ValueError if any part is missing or not a JSON object.
+        """
+        data = _parse_llm_json(combined_raw)
+        if not isinstance(data, dict):
+            raise ValueError("Vent analysis is not a JSON object")
+        parts = tuple(data.get(key) for key in ("decode", "reframe", "action"))
+        if not all(isinstance(part, dict) for part in parts):
+            raise ValueError("Vent analysis is missing 'decode', 'reframe' or 'action'")
+        return parts
 
     def load_kolb_template(self):
         path = os.path.join(self.script_dir, 'Kolb_template.json')
         if os.path.exists(path):
-            with open(path, 'r') as f: return json.load(f)
+            with open(path, 'r', encoding='utf-8') as f: return json_utils.load(f)
         return {}
 
     def save_daily_entry(self, data, raw_conversation):
-        timestamp = datetime.now().strftime('%Y-%m-%d-%H%M%S')
-        filename = os.path.join(self.daily_dir, f"{timestamp}.md")
+        now = datetime.now()
+        filename = os.path.join(self.daily_dir, f"{now.strftime('%Y-%m-%d-%H%M%S')}.md")
         
         content = f"""---
-date: {datetime.now().isoformat()}
+date: {now.isoformat()}
 summary: {data.get('summary')}
 solution: {data.get('proposed_solution')}
 key_takeaway: {data.get('key_takeaway')}
@@ -301,33 +784,220 @@ key_takeaway: {data.get('key_takeaway')}
 # Full Conversation
 {raw_conversation}
 """
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
+        saved_at = time.time()
+        self._io_pool.submit(self._write_file, filename, content, saved_at)
+        self._update_entry_index([
+            (os.path.basename(filename), saved_at, data.get('summary'), data.get('key_takeaway'))
+        ])
         print(f"Saved to {filename}")
 
+    def _load_entry_index(self):
+        """Load the daily entry manifest ({field: [values...]} for ENTRY_INDEX_FIELDS)."""
+        index = {field: [] for field in ENTRY_INDEX_FIELDS}
+        if os.path.exists(self.entry_index_file):
+            try:
+                with open(self.entry_index_file, 'r', encoding='utf-8') as f:
+                    index.update(json_utils.load(f))
+            except (json.JSONDecodeError, IOError):
+                pass
+        return index
+
+    def _update_entry_index(self, records):
+        """
+        Insert or update (filename, mtime, summary, takeaway) records in the
+        manifest, then queue an atomic rewrite of it on the background writer.
+        Rows for entries deleted from daily/ are dropped.
+        """
+        index = self._entry_index
+        try:
+            existing = set(os.listdir(self.daily_dir))
+        except OSError:
+            existing = None
+        if existing is not None:
+            # The records' own files may still be queued for writing; keep them
+            existing.update(record[0] for record in records)
+            keep = [i for i, fname in enumerate(index["filename"]) if fname in existing]
+            if len(keep) < len(index["filename"]):
+                for field in ENTRY_INDEX_FIELDS:
+                    index[field] = [index[field][i] for i in keep]
+        positions = {fname: i for i, fname in enumerate(index["filename"])}
+        for record in records:
+            i = positions.get(record[0])
+            for field, value in zip(ENTRY_INDEX_FIELDS, record):
+                if i is None:
+                    index[field].append(value)
+                else:
+                    index[field][i] = value
+            if i is None:
+                positions[record[0]] = len(index["filename"]) - 1
+        
+        self._io_pool.submit(self._write_file, self.entry_index_file, json_utils.dumps(index))
+
+    def _write_file(self, path, text, mtime=None):
+        """
+        Atomically write text to path. Runs on the background writer.
+        `mtime` stamps the file so it matches the time recorded in the manifest.
+        """
+        tmp_file = path + ".tmp"
+        try:
+            # Encode once and write the bytes straight to the fd, skipping
+            # the text-mode wrapper and its buffer
+            view = memoryview(text.encode('utf-8'))
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            if mtime is not None:
+                os.utime(tmp_file, (mtime, mtime))
+            os.replace(tmp_file, path)
+        except IOError as e:
+            print(f"\nWrite Error ({path}): {e}")
+
+    def _flush_writes(self):
+        """Block until all queued background writes (and graph ingestion) have finished."""
+        self._io_pool.submit(lambda: None).result()
+
     def save_weekly_context(self, summary_json):
         """Saves the high-level summary to be used next week."""
-        with open(self.context_file, 'w', encoding='utf-8') as f:
-            json.dump(summary_json, f, indent=2)
+        self._io_pool.submit(self._write_file, self.context_file, json_utils.dumps(summary_json, indent=True))
         print("Weekly progression context updated.")
 
     def load_last_week_context(self):
+        self._flush_writes()
         if os.path.exists(self.context_file):
-            with open(self.context_file, 'r') as f:
-                return json.load(f)
+            with open(self.context_file, 'r', encoding='utf-8') as f:
+                return json_utils.load(f)
         return "No previous weekly context found."
 
     def load_weekly_entries(self):
-        # (Same logic as before, simplified)
-        seven_days_ago = datetime.now() - timedelta(days=7)
+        """
+        Return (filename, summary, content) for daily entries from the last 7 days.
+
+        Entries in the manifest come back with their stored summary and no
+        content. Entries missing from it (written before the manifest existed)
+        or modified since they were indexed are re-indexed from their
+        frontmatter summary; those without one, and indexed entries saved
+        without a summary, are read with summary=None.
+        """
+        self._flush_writes()
+        week_ago = datetime.now() - timedelta(days=7)
+        cutoff = week_ago.timestamp()
+        # Entry names start with their creation date (see save_daily_entry), so
+        # a string comparison drops older entries before any stat call.
+        # Names that aren't dates sort after digits and are kept.
+        cutoff_name = week_ago.strftime('%Y-%m-%d')
+        
+        # One directory scan gives each recent entry's current mtime
+        with os.scandir(self.daily_dir) as it:
+            disk_mtimes = {e.name: e.stat().st_mtime for e in it
+                           if e.name.endswith(".md") and e.name[:10] >= cutoff_name}
+        
+        index = self._entry_index
         entries = []
-        for fname in sorted(os.listdir(self.daily_dir)):
-            if fname.endswith(".md"):
-                # Basic check if file is recent enough
-                filepath = os.path.join(self.daily_dir, fname)
-                if datetime.fromtimestamp(os.path.getmtime(filepath)) > seven_days_ago:
-                    with open(filepath, 'r') as f: entries.append(f"--- {fname} ---\n{f.read()}")
-        return "\n".join(entries) if entries else "No entries this week."
+        fresh = set()
+        for fname, mtime, summary, takeaway in zip(*(index[f] for f in ENTRY_INDEX_FIELDS)):
+            disk_mtime = disk_mtimes.get(fname)
+            if disk_mtime is None or disk_mtime - mtime > MTIME_TOLERANCE:
+                continue  # Older, deleted, or edited since indexed (re-indexed below)
+            fresh.add(fname)
+            if mtime <= cutoff:
+                continue
+            if summary:
+                text = f"{summary} / Key takeaway: {takeaway}" if takeaway else summary
+                entries.append((fname, text, None))
+            else:
+                entries.append((fname, None, self._read_daily_entry(fname)))
+        
+        # Entries not (or no longer) covered by the manifest
+        records = []
+        for fname, mtime in disk_mtimes.items():
+            if fname in fresh or mtime <= cutoff:
+                continue
+            frontmatter = self._read_frontmatter(fname)
+            summary = frontmatter.get('summary')
+            if summary and summary != "None":
+                takeaway = frontmatter.get('key_takeaway')
+                takeaway = takeaway if takeaway and takeaway != "None" else ""
+                records.append((fname, mtime, summary, takeaway))
+                text = f"{summary} / Key takeaway: {takeaway}" if takeaway else summary
+                entries.append((fname, text, None))
+            else:
+                entries.append((fname, None, self._read_daily_entry(fname)))
+        if records:
+            self._update_entry_index(records)
+        
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def _read_frontmatter(self, fname):
+        """
+        Parse the `key: value` frontmatter of a daily entry. The file is
+        memory-mapped and only the frontmatter bytes are decoded, not the
+        conversation below it. Returns {} if the entry has no frontmatter.
+        """
+        filepath = os.path.join(self.daily_dir, fname)
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:3] != b'---':
+                    return {}
+                end = mm.find(b'\n---', 3)
+                if end == -1:
+                    return {}
+                frontmatter = mm[3:end].decode('utf-8')
+        
+        fields = {}
+        for line in frontmatter.splitlines():
+            key, sep, value = line.partition(':')
+            if sep:
+                fields[key.strip()] = value.strip()
+        return fields
+
+    def _read_daily_entry(self, fname):
+        """Read a daily entry's markdown, or None if it no longer exists."""
+        filepath = os.path.join(self.daily_dir, fname)
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def summarize_weekly_entries(self, entries):
+        """
+        Map-reduce the week's entries: summarize entries without a stored
+        summary concurrently, then join all summaries into the weekly prompt data.
+        New summaries are written back to the manifest so each file is
+        summarized once. Falls back to the full entry if its summary call fails.
+        """
+        # Entries that vanished or are empty have nothing to summarize
+        pending = [(fname, content) for fname, summary, content in entries
+                   if summary is None and content and content.strip()]
+        results = self._call_llm_batch([(ENTRY_SUMMARY_PROMPT, content) for _, content in pending])
+        
+        new_summaries = {}
+        records = []
+        for (fname, content), summary in zip(pending, results):
+            if summary.startswith("Error:"):
+                new_summaries[fname] = content
+                continue
+            new_summaries[fname] = summary
+            try:
+                mtime = os.path.getmtime(os.path.join(self.daily_dir, fname))
+            except OSError:
+                continue  # Removed since it was listed; use the summary but don't index it
+            records.append((fname, mtime, summary, ""))
+        if records:
+            self._update_entry_index(records)
+        
+        # One compact "- <date>: <summary>" item per entry (filenames start with the date)
+        parts = []
+        for fname, summary, _ in entries:
+            summary = summary or new_summaries.get(fname)
+            if summary:
+                parts.append(f"- {fname[:10]}: {summary}")
+        return "\n".join(parts)
     
     def _run_grounding_protocol(self):
         """Mandatory grounding protocol for frontal cortex reset."""
@@ -342,15 +1012,28 @@ key_takeaway: {data.get('key_takeaway')}
         # Step 1: Physiological Sigh
         step1 = grounding.get('sequence', {}).get('1_physiological_sigh', {})
         print(f"\n{step1.get('instruction', 'Take a deep breath...')}")
-        input("\nPress Enter after your exhale...")
+        self._grounding_pause(step1, "\nPress Enter after your exhale...", default_seconds=10)
         
         # Step 2: Micro Anchor
         step2 = grounding.get('sequence', {}).get('2_micro_anchor', {})
         print(f"\n{step2.get('instruction', 'Notice your surroundings...')}")
-        input("\nPress Enter to continue...")
+        self._grounding_pause(step2, "\nPress Enter to continue...", default_seconds=5)
         
         print("\n✓ Grounded. Let's begin.\n")
     
+    def _grounding_pause(self, step, prompt, default_seconds):
+        """
+        Wait for Enter on an interactive terminal. Piped runs, or
+        INTERACTIVE_GROUNDING=0, count down the step's `duration_seconds` instead.
+        """
+        if INTERACTIVE_GROUNDING and sys.stdin.isatty():
+            input(prompt)
+            return
+        for remaining in range(int(step.get('duration_seconds', default_seconds)), 0, -1):
+            print(f"\r  {remaining:2d}s remaining", end="", flush=True)
+            time.sleep(1)
+        print("\r" + " " * 16)
+    
     def _build_experiment_context(self) -> str:
         """Build experiment context with guardrails."""
         active_experiments = self.tracking_manager.get_active_experiments()
@@ -370,6 +1053,17 @@ key_takeaway: {data.get('key_takeaway')}
         
         return "\n".join(context_parts) if context_parts else ""
     
+    def _graph_context(self, text: str) -> str:
+        """Ego-walk context for the nodes matching `text`, memoized until the next ingestion."""
+        self._flush_writes()  # A pending ingestion must land (and clear the memo) first
+        context = self._graph_context_cache.get(text)
+        if context is None:
+            anchors = self.graph_manager.find_nodes_by_text(text)
+            anchor_ids = [n['id'] for n in anchors]
+            context = self.graph_manager.ego_walk(anchor_ids[:3]) if anchor_ids else "No specific past patterns found."
+            self._graph_context_cache[text] = context
+        return context
+
     def _check_grounding_offer(self, text: str) -> bool:
         """Check if we should offer grounding based on physical sensation triggers."""
         return self.skill_loader.check_physical_sensation_triggers(text)
@@ -382,8 +1076,6 @@ key_takeaway: {data.get('key_takeaway')}
         # MANDATORY: Run grounding protocol first
         self._run_grounding_protocol()
         
-        kolb_template = self.load_kolb_template()
-        
         # Show any experiments needing follow-up
         needs_followup = self.tracking_manager.get_experiments_needing_followup()
         if needs_followup:
@@ -396,9 +1088,12 @@ key_takeaway: {data.get('key_takeaway')}
         initial_thought = self._get_multiline_input("What's on your mind?")
         if not initial_thought: return
 
-        history = []
+        # The last session's graph ingestion must land before the graph is read
+        self._flush_writes()
+        history = ConversationWindow(self._call_llm, executor=self._llm_pool)
         user_input = initial_thought
         self.current_stage = "experience"  # Reset stage tracking
+        self.context_manager.start_session()  # Reset accumulated graph context
         
         print("\nStarting Coach Session (Type 'EXIT' to cancel, 'SAVE' to finish)...")
 
@@ -406,8 +1101,8 @@ key_takeaway: {data.get('key_takeaway')}
             # 1. Build rich context using Context Manager
             session_ctx = self.context_manager.build_session_context(user_input)
             
-            # 2. Format hierarchical context
-            hierarchical_context = self.context_manager.get_full_context_block(user_input)
+            # 2. Format hierarchical context (from the same SessionContext)
+            hierarchical_context = self.context_manager.format_context_block(session_ctx)
             
             # 3. Get stage-specific rules from skills
             stage_rules = self.skill_loader.build_stage_prompt_context(self.current_stage)
@@ -424,7 +1119,8 @@ key_takeaway: {data.get('key_takeaway')}
                     stage_rules += f"\n\nGROUNDING OFFER (user mentioned physical sensation):\n{grounding_offer}"
             
             # 6. Dynamic Prompting with enhanced context
-            prompt_text = DAILY_GUIDANCE_PROMPT.format(
+            turn_context = _render_template(
+                _DAILY_CONTEXT_PARTS,
                 current_step=self.current_stage.title(),
                 hierarchical_context=hierarchical_context,
                 graph_context=session_ctx.graph_context or "No specific past context found.",
@@ -433,40 +1129,48 @@ key_takeaway: {data.get('key_takeaway')}
             )
             
             # 4. LLM Response
-            ai_msg = self._call_llm(prompt_text, user_input, history)
-            print(f"\nCoach: {ai_msg}")
+            print("\nCoach: ", end="", flush=True)
+            ai_msg = self._call_llm(DAILY_GUIDANCE_PROMPT, user_input, history.messages, context=turn_context, stream=True,
+                                    semantic=True)
 
-            # Add to history
-            history.append({"role": "user", "content": user_input})
-            history.append({"role": "assistant", "content": ai_msg})
+            # Add to history (older turns are folded into a rolling summary)
+            history.append(user_input, ai_msg)
+            self._warm_prompt_cache(DAILY_GUIDANCE_PROMPT, history.messages)
 
             # Get Next Input
             user_input = self._get_multiline_input("You")
             
             # Check for exit/cancel commands
-            if user_input.strip().upper() in ['SAVE', 'DONE']:
+            cmd = _session_command(user_input)
+            if cmd in ('SAVE', 'DONE'):
                 break
-            if user_input.strip().upper() == 'EXIT' or not user_input.strip():
+            if cmd == 'EXIT' or not user_input.strip():
                 print("\nSession cancelled. No data saved.")
                 return  # Exit without saving
         
         # Generate Summary
         print("\nGenerating Summary...")
-        full_text = "\n".join([f"{m['role']}: {m['content']}" for m in history])
-        summary_raw = self._call_llm(DAILY_SUMMARY_PROMPT, full_text)
-        
-        data = {}
+        full_text = history.transcript_text()
+        # One call returns both the summary and the experiment
+        exp_raw = exp_data = None
         try:
-            summary_clean = self._strip_markdown_json(summary_raw)
-            data = json.loads(summary_clean)
-            self.save_daily_entry(data, full_text)
-        except:
-            print("Error parsing summary JSON. Saving raw text.")
-            self.save_daily_entry({}, full_text)
+            data, exp_data = self._parse_daily_tail(self._call_llm(DAILY_TAIL_PROMPT, full_text))
+        except ValueError:
+            # Fall back to the separate prompts, run concurrently
+            summary_raw, exp_raw = self._call_llm_batch([
+                (DAILY_SUMMARY_PROMPT, full_text),
+                (EXPERIMENT_EXTRACTION_PROMPT, full_text)
+            ])
+            try:
+                data = self._parse_daily_summary(summary_raw)
+            except ValueError:
+                print("Error parsing summary JSON. Saving raw text.")
+                data = {}
+        self.save_daily_entry(data, full_text)
 
         # Extract and save any new experiments
         print("\n[Experiment Tracker] Checking for new experiments...")
-        self._extract_and_save_experiments(full_text)
+        self._extract_and_save_experiments(full_text, exp_raw, exp_data)
         
         # Save session memory for continuity
         self.context_manager.save_session_memory(
@@ -477,17 +1181,29 @@ key_takeaway: {data.get('key_takeaway')}
         )
 
         # Post-Session Graph Ingestion
-        print("\n[Graph Manager] Ingesting full session into Psyche Graph...")
-        self.ingestion_pipeline.process_session(full_text)
-        self.graph_manager.save_graph()
-        print("[Graph Manager] Ingestion Complete.")
+        print("\n[Graph Manager] Ingesting full session into Psyche Graph in the background...")
+        self._io_pool.submit(self._persist_session, full_text)
     
-    def _extract_and_save_experiments(self, full_text: str):
-        """Extract experiments from conversation and save to tracking system."""
+    def _persist_session(self, full_text: str):
+        """Ingest a finished session into the graph and save it. Runs on `_io_pool`."""
         try:
-            exp_raw = self._call_llm(EXPERIMENT_EXTRACTION_PROMPT, full_text)
-            exp_clean = self._strip_markdown_json(exp_raw)
-            exp_data = json.loads(exp_clean)
+            # Persists its own additions, once, when anything was extracted
+            self.ingestion_pipeline.process_session(full_text)
+            self._graph_context_cache.clear()
+        except Exception as e:
+            print(f"\n[Graph Manager] Ingestion failed: {e}")
+
+    def _extract_and_save_experiments(self, full_text: str, exp_raw: str = None, exp_data: dict = None):
+        """
+        Extract experiments from conversation and save to tracking system.
+        Pass `exp_raw` when the extraction call was already made (e.g. batched),
+        or `exp_data` when it was already parsed (e.g. from DAILY_TAIL_PROMPT).
+        """
+        try:
+            if exp_data is None:
+                if exp_raw is None:
+                    exp_raw = self._call_llm(EXPERIMENT_EXTRACTION_PROMPT, full_text)
+                exp_data = _parse_llm_json(exp_raw)
             
             if exp_data.get("experiment_found", False):
                 exp = self.tracking_manager.create_experiment(
@@ -506,67 +1222,72 @@ key_takeaway: {data.get('key_takeaway')}
         
         # 1. Load Data
         past_context = self.load_last_week_context()
-        current_data = self.load_weekly_entries()
+        entries = self.load_weekly_entries()
         
-        if "No entries" in current_data:
+        if not entries:
             print("Not enough daily entries for a review.")
             return
+        
+        print(f"\nSummarizing {len(entries)} entries from this week...")
+        current_data = self.summarize_weekly_entries(entries)
 
         print(f"\nContext from previous week: {past_context}")
         
         # 2. Chat Loop
-        history = []
+        history = ConversationWindow(self._call_llm, executor=self._llm_pool)
         user_input = "I'm ready to review my week."
         
+        # Week data is fixed for the session, so it belongs in the cached prefix
+        prev_context = json_utils.dumps(past_context)
+        budget = WEEKLY_PROMPT_TOKEN_BUDGET - _WEEKLY_STATIC_TOKENS - _count_tokens(prev_context)
+        current_data = _truncate_to_tokens(current_data, max(budget, 0))
+        sys_prompt = _render_template(
+            _WEEKLY_SYSTEM_PARTS,
+            prev_context=prev_context, 
+            current_data=current_data
+        )
+        
         while True:
         # Retrieve Graph Context (same as daily reflection)
-            anchors = self.graph_manager.find_nodes_by_text(user_input)
-            anchor_ids = [n['id'] for n in anchors]
-            graph_context = self.graph_manager.ego_walk(anchor_ids[:3]) if anchor_ids else "No specific past patterns found."
-            # Inject context into system prompt
-            sys_prompt = WEEKLY_SYSTEM_PROMPT.format(
-                prev_context=json.dumps(past_context), 
-                current_data=current_data,
-                graph_context=graph_context
-            )
+            graph_context = self._graph_context(user_input)
+            turn_context = _render_template(_WEEKLY_CONTEXT_PARTS, graph_context=graph_context)
             
             ### LLM response 
-            ai_msg = self._call_llm(sys_prompt, user_input, history)
-            print(f"\nCoach: {ai_msg}")
+            print("\nCoach: ", end="", flush=True)
+            ai_msg = self._call_llm(sys_prompt, user_input, history.messages, context=turn_context, stream=True,
+                                    semantic=True)
             
             ### Add to history
-            history.append({"role": "user", "content": user_input})
-            history.append({"role": "assistant", "content": ai_msg})
+            history.append(user_input, ai_msg)
+            self._warm_prompt_cache(sys_prompt, history.messages)
             
             ### Get Next Input
             user_input = self._get_multiline_input("You")
             
             # Check for exit/cancel commands
-            if user_input.strip().upper() in ['SAVE', 'DONE']:
+            cmd = _session_command(user_input)
+            if cmd in ('SAVE', 'DONE'):
                 break
-            if user_input.strip().upper() == 'EXIT' or not user_input.strip():
+            if cmd == 'EXIT' or not user_input.strip():
                 print("\nSession cancelled. No data saved.")
                 return  # Exit without saving
         
         # 3. Generate Progression Summary
         print("\nCreating building blocks for next week...")
-        full_text = "\n".join([f"{m['role']}: {m['content']}" for m in history])
+        full_text = history.transcript_text()
         summary_raw = self._call_llm(WEEKLY_SUMMARY_PROMPT, full_text)
         
         try:
             # Clean up potential markdown formatting
-            summary_clean = self._strip_markdown_json(summary_raw)
-            summary_json = json.loads(summary_clean)
+            summary_json = _parse_llm_json(summary_raw)
             self.save_weekly_context(summary_json)
             print(f"\nNext Week's Focus: {summary_json.get('focus_for_next_week')}")
         except:
             print("Could not generate structured weekly summary.")
         
         #4. Post-Session Graph Ingestion
-        print("\n[Graph Manager] Ingesting full session into Psyche Graph...")
-        self.ingestion_pipeline.process_session(full_text)
-        self.graph_manager.save_graph()
-        print("[Graph Manager] Ingestion Complete.")
+        print("\n[Graph Manager] Ingesting full session into Psyche Graph in the background...")
+        self._io_pool.submit(self._persist_session, full_text)
 
     def run_goal_management(self):
         """Interactive goal and habit management."""
@@ -652,22 +1373,24 @@ key_takeaway: {data.get('key_takeaway')}
         print("\n🤖 Starting collaborative habit development session...")
         print("(Type 'DONE' or 'FINALIZE' when ready to save habits, 'EXIT' to cancel)\n")
         
-        system_prompt = HABIT_DEVELOPMENT_PROMPT.format(
+        system_prompt = _render_template(
+            _HABIT_DEVELOPMENT_PARTS,
             goal_title=goal.title,
             goal_description=goal.description
         )
         
-        history = []
+        history = ConversationWindow(self._call_llm, executor=self._llm_pool)
         user_input = "Let's work together to break down this goal into habits."
         
         while True:
-            # Get LLM response
-            ai_msg = self._call_llm(system_prompt, user_input, history)
-            print(f"\nCoach: {ai_msg}")
+            # Get LLM response (streamed as it is generated)
+            print("\nCoach: ", end="", flush=True)
+            ai_msg = self._call_llm(system_prompt, user_input, history.messages, stream=True, timeout=30,
+                                    semantic=True)
             
-            # Add to history
-            history.append({"role": "user", "content": user_input})
-            history.append({"role": "assistant", "content": ai_msg})
+            # Add to history (older turns are folded into a rolling summary)
+            history.append(user_input, ai_msg)
+            self._warm_prompt_cache(system_prompt, history.messages)
             
             # Get next user input
             user_input = self._get_multiline_input("You")
@@ -677,7 +1400,7 @@ key_takeaway: {data.get('key_takeaway')}
                 print("\nSession cancelled. No habits saved.")
                 return
             
-            cmd = user_input.strip().upper()
+            cmd = _session_command(user_input)
             if cmd == 'EXIT':
                 print("\nSession cancelled. No habits saved.")
                 return
@@ -694,10 +1417,11 @@ key_takeaway: {data.get('key_takeaway')}
 ```
 Include only the habits that were agreed upon."""
         
-        final_response = self._call_llm(system_prompt, finalize_prompt, history)
+        # The full transcript, so no agreed habit is lost to summarization
+        final_response = self._call_llm(system_prompt, finalize_prompt, history.transcript)
         
         try:
-            habits_data = json.loads(self._strip_markdown_json(final_response))
+            habits_data = _parse_llm_json(final_response)
             
             print(f"\n📋 Habits developed for '{goal.title}':\n")
             for i, h in enumerate(habits_data, 1):
@@ -724,16 +1448,9 @@ Include only the habits that were agreed upon."""
                     return
             
             # Create selected habits
-            for idx in indices:
-                if 0 <= idx < len(habits_data):
-                    h = habits_data[idx]
-                    habit = self.tracking_manager.create_habit(
-                        title=h['title'],
-                        description=h.get('description', ''),
-                        goal_id=goal.id,
-                        components=h.get('components', [])
-                    )
-                    print(f"  ✓ Saved: {habit.title}")
+            selected = [habits_data[idx] for idx in indices if 0 <= idx < len(habits_data)]
+            for habit in self.tracking_manager.create_habits_bulk(selected, goal_id=goal.id):
+                print(f"  ✓ Saved: {habit.title}")
             
         except (json.JSONDecodeError, KeyError) as e:
             print(f"\nCould not parse final habits. Here's what the AI said:")
@@ -802,63 +1519,70 @@ Include only the habits that were agreed upon."""
         if components:
             print(f"  Components: {', '.join(components)}")
     
-    def _ai_habit_session(self, goal, existing_habits):
-        """AI-assisted session to develop/refine habits with context."""
-        print("\n🤖 Starting AI-assisted habit session...")
-        print("(Type 'DONE' to finalize, 'EXIT' to cancel)\n")
-        
-        # Build context about existing habits
-        habits_context = ""
+    def _habits_context(self, goal_id, existing_habits):
+        """
+        Render the existing-habits block of the refinement prompt. Reused while
+        the goal's habits are unchanged, so revisiting a goal sends a
+        byte-identical system prompt (a prompt cache hit).
+        """
+        fields = tuple((h.title, h.description) for h in existing_habits)
+        cached = self._habits_context_cache.get(goal_id)
+        if cached and cached[0] == fields:
+            return cached[1]
         if existing_habits:
             habits_context = "EXISTING HABITS:\n" + "\n".join(
-                f"- {h.title}: {h.description}" for h in existing_habits
+                f"- {title}: {description}" for title, description in fields
             )
         else:
             habits_context = "No habits defined yet for this goal."
-        
-        system_prompt = f"""You are a performance coach helping refine habits for a goal.
-
-GOAL: {goal.title}
-DESCRIPTION: {goal.description}
-
-{habits_context}
-
-Your role:
-- Help add new habits or refine existing ones
-- Identify gaps in the current habit structure
-- Suggest component skills for each habit
-- Be collaborative and build on the user's ideas
+        self._habits_context_cache[goal_id] = (fields, habits_context)
+        return habits_context
 
-When user says 'DONE', output final NEW habits as JSON:
-```json
-[{{"title": "Habit", "description": "...", "components": ["..."]}}]
-```"""
+    def _ai_habit_session(self, goal, existing_habits):
+        """AI-assisted session to develop/refine habits with context."""
+        print("\n🤖 Starting AI-assisted habit session...")
+        print("(Type 'DONE' to finalize, 'EXIT' to cancel)\n")
         
-        history = []
+        system_prompt = _render_template(
+            _HABIT_REFINEMENT_PARTS,
+            goal_title=goal.title,
+            goal_description=goal.description,
+            habits_context=self._habits_context(goal.id, existing_habits)
+        )
+        
+        history = ConversationWindow(self._call_llm, executor=self._llm_pool)
         user_input = "Let's work on habits for this goal."
         
         while True:
-            ai_msg = self._call_llm(system_prompt, user_input, history)
-            print(f"\nCoach: {ai_msg}")
+            print("\nCoach: ", end="", flush=True)
+            ai_msg = self._call_llm(system_prompt, user_input, history.messages, stream=True, timeout=30,
+                                    semantic=True)
             
-            history.append({"role": "user", "content": user_input})
-            history.append({"role": "assistant", "content": ai_msg})
+            history.append(user_input, ai_msg)
+            self._warm_prompt_cache(system_prompt, history.messages)
             
             user_input = self._get_multiline_input("You")
             
-            if not user_input.strip() or user_input.strip().upper() == 'EXIT':
+            cmd = _session_command(user_input)
+            if not user_input.strip() or cmd == 'EXIT':
                 print("\nSession cancelled.")
                 return
-            if user_input.strip().upper() in ['DONE', 'SAVE']:
+            if cmd in ('DONE', 'SAVE'):
                 break
         
-        # Get final habits
+        # The DONE turn itself carries the JSON (see HABIT_REFINEMENT_PROMPT), so it
+        # continues the cached conversation prefix instead of a separate extraction call
         print("\n📋 Generating habit list...")
-        final = self._call_llm(system_prompt, 
-            "Output only the NEW habits we discussed as JSON array.", history)
+        final = self._call_llm(system_prompt, user_input, history.messages, timeout=30)
         
         try:
-            habits_data = json.loads(self._strip_markdown_json(final))
+            try:
+                habits_data = _parse_llm_json(final)
+            except ValueError:
+                # No usable block in the reply; extract from the full transcript
+                final = self._call_llm(system_prompt,
+                    "Output only the NEW habits we discussed as JSON array.", history.transcript)
+                habits_data = _parse_llm_json(final)
             if not habits_data:
                 print("No new habits to add.")
                 return
@@ -869,11 +1593,7 @@ When user says 'DONE', output final NEW habits as JSON:
             
             print("\nSave these? (y/n)")
             if input().strip().lower() == 'y':
-                for h in habits_data:
-                    habit = self.tracking_manager.create_habit(
-                        h['title'], h.get('description', ''),
-                        goal.id, h.get('components', [])
-                    )
+                for habit in self.tracking_manager.create_habits_bulk(habits_data, goal_id=goal.id):
                     print(f"  ✓ Saved: {habit.title}")
         except:
             print("Could not parse habits. Add manually if needed.")
@@ -950,9 +1670,9 @@ When user says 'DONE', output final NEW habits as JSON:
                 return
             
             print("\nSelect goal to delete:")
+            habit_counts = self.tracking_manager.get_habit_counts()
             for i, g in enumerate(goals, 1):
-                habits = self.tracking_manager.get_habits_for_goal(g.id)
-                print(f"  {i}. {g.title} ({len(habits)} habits)")
+                print(f"  {i}. {g.title} ({habit_counts.get(g.id, 0)} habits)")
             
             try:
                 idx = int(input("Goal number: ")) - 1
@@ -1006,23 +1726,20 @@ When user says 'DONE', output final NEW habits as JSON:
             
             print(f"{len(experiments)+2}. Back to Main Menu")
             
+            # Menu number -> protocol; user experiments use the experiment manager's nudge
+            protocols = {'1': self.run_vent_reframe}
+            for i, exp in enumerate(experiments, 2):
+                protocols[str(i)] = lambda exp_id=exp.id: self.experiment_manager.nudge(exp_id)
+            
             choice = input("\nSelect protocol to run: ").strip()
             
-            if choice == '1':
-                self.run_vent_reframe()
-            elif choice == str(len(experiments)+2):
+            if choice == str(len(experiments)+2):
                 break
+            protocol = protocols.get(choice)
+            if protocol:
+                protocol()
             else:
-                try:
-                    idx = int(choice) - 2
-                    if 0 <= idx < len(experiments):
-                        exp = experiments[idx]
-                        # Use the experiment manager's nudge feature
-                        self.experiment_manager.nudge(exp.id)
-                    else:
-                        print("Invalid selection.")
-                except ValueError:
-                    print("Invalid input.")
+                print("Invalid selection.")
 
     def run_vent_reframe(self):
         """
@@ -1046,26 +1763,34 @@ When user says 'DONE', output final NEW habits as JSON:
         
         print(f"\n🔴 Frustration Signal Detected")
         print(f"Current tension level: {pre_tension}/5")
-        print(f"{'█' * pre_tension}{'░' * (5 - pre_tension)}")
+        print(_TENSION_BARS[pre_tension])
         print("\nTake a moment to acknowledge this feeling without judgment.")
         
         # Step 2 & 3: Vent and Decode
         print("\n--- Step 2-3: Vent & Decode ---")
         vent_text = self._get_multiline_input("Vent freely (what's frustrating you?)")
         
-        if not vent_text or vent_text.strip().upper() == 'EXIT':
+        if not vent_text or _session_command(vent_text) == 'EXIT':
             print("\nSession cancelled.")
             return
         
         print("\nAnalyzing your frustration...")
-        decode_prompt = VENT_DECODE_PROMPT.format(vent_text=vent_text)
-        decode_raw = self._call_llm(decode_prompt, vent_text)
-        
+        combined_prompt = _render_template(_VENT_COMBINED_PARTS, vent_text=vent_text)
         try:
-            decode_data = json.loads(self._strip_markdown_json(decode_raw))
-        except json.JSONDecodeError:
-            print("Could not analyze. Please try again.")
-            return
+            decode_data, reframe_data, action_data = self._parse_vent_combined(
+                self._call_llm(combined_prompt, vent_text, timeout=30)
+            )
+        except ValueError:
+            # Fall back to the staged prompts; reframe and action are requested below
+            reframe_data = action_data = None
+            decode_prompt = _render_template(_VENT_DECODE_PARTS, vent_text=vent_text)
+            decode_raw = self._call_llm(decode_prompt, vent_text, timeout=30)
+            
+            try:
+                decode_data = _parse_llm_json(decode_raw)
+            except json.JSONDecodeError:
+                print("Could not analyze. Please try again.")
+                return
         
         underlying_need = decode_data.get("underlying_need", "")
         need_category = decode_data.get("need_category", "unknown")
@@ -1082,17 +1807,19 @@ When user says 'DONE', output final NEW habits as JSON:
         
         # Step 4: Reframe
         print("\n--- Step 4: Reframe ---")
-        reframe_prompt = VENT_REFRAME_PROMPT.format(
-            underlying_need=underlying_need,
-            need_category=need_category,
-            vent_text=vent_text
-        )
-        reframe_raw = self._call_llm(reframe_prompt, vent_text)
-        
-        try:
-            reframe_data = json.loads(self._strip_markdown_json(reframe_raw))
-        except json.JSONDecodeError:
-            reframe_data = {"reframe_question": "What is one small step I can take right now?"}
+        if reframe_data is None:
+            reframe_prompt = _render_template(
+                _VENT_REFRAME_PARTS,
+                underlying_need=underlying_need,
+                need_category=need_category,
+                vent_text=vent_text
+            )
+            reframe_raw = self._call_llm(reframe_prompt, vent_text, timeout=30)
+            
+            try:
+                reframe_data = _parse_llm_json(reframe_raw)
+            except json.JSONDecodeError:
+                reframe_data = {"reframe_question": "What is one small step I can take right now?"}
         
         reframe_question = reframe_data.get("reframe_question", "")
         print(f"\n💡 Reframe Question")
@@ -1102,17 +1829,19 @@ When user says 'DONE', output final NEW habits as JSON:
         
         # Step 5: Micro-action
         print("\n--- Step 5: Micro-Action ---")
-        action_prompt = VENT_MICRO_ACTION_PROMPT.format(
-            reframe_question=reframe_question,
-            underlying_need=underlying_need,
-            need_category=need_category
-        )
-        action_raw = self._call_llm(action_prompt, reframe_question)
-        
-        try:
-            action_data = json.loads(self._strip_markdown_json(action_raw))
-        except json.JSONDecodeError:
-            action_data = {"micro_action": "Take 5 minutes to write down what you need."}
+        if action_data is None:
+            action_prompt = _render_template(
+                _VENT_MICRO_ACTION_PARTS,
+                reframe_question=reframe_question,
+                underlying_need=underlying_need,
+                need_category=need_category
+            )
+            action_raw = self._call_llm(action_prompt, reframe_question, timeout=30)
+            
+            try:
+                action_data = _parse_llm_json(action_raw)
+            except json.JSONDecodeError:
+                action_data = {"micro_action": "Take 5 minutes to write down what you need."}
         
         micro_action = action_data.get("micro_action", "")
         print(f"\n⚡ Your Micro-Action (5 minutes)")
@@ -1138,15 +1867,14 @@ When user says 'DONE', output final NEW habits as JSON:
         delta_str = f"+{abs(delta)} improvement" if delta > 0 else f"{abs(delta)} increase" if delta < 0 else "no change"
         
         print(f"\n✅ Session Complete")
-        print(f"\nTension Before: {pre_tension}/5 {'█' * pre_tension}{'░' * (5 - pre_tension)}")
-        print(f"Tension After:  {post_tension}/5 {'█' * post_tension}{'░' * (5 - post_tension)}")
+        print(f"\nTension Before: {pre_tension}/5 {_TENSION_BARS[pre_tension]}")
+        print(f"Tension After:  {post_tension}/5 {_TENSION_BARS[post_tension]}")
         print(f"Change: {delta_str}")
         print(f"\nNeed category: {need_category}")
         print(f"Action taken: {'Yes ✓' if action_taken else 'Not yet'}")
         
         # Log to experiment if exists
-        experiments = self.tracking_manager.get_active_experiments()
-        vent_exp = next((e for e in experiments if 'vent' in e.title.lower() or 'reframe' in e.title.lower()), None)
+        vent_exp = self._find_vent_experiment()
         
         if vent_exp:
             outcome = "success" if delta > 0 else "partial" if delta == 0 else "not_tried"
@@ -1170,6 +1898,12 @@ When user says 'DONE', output final NEW habits as JSON:
 
 if __name__ == "__main__":
     agent = ReflectionCoach()
+    menu = {
+        '1': agent.run_daily_reflection,
+        '2': agent.run_weekly_review,
+        '3': agent.run_goal_management,
+        '4': agent.run_experiments_session,
+    }
     
     while True:
         print("\n╔══════════════════════════════════╗")
@@ -1182,9 +1916,15 @@ if __name__ == "__main__":
         print("║  5: Exit                         ║")
         print("╚══════════════════════════════════╝")
         choice = input("Select: ")
-        
-        if choice == '1': agent.run_daily_reflection()
-        elif choice == '2': agent.run_weekly_review()
-        elif choice == '3': agent.run_goal_management()
-        elif choice == '4': agent.run_experiments_session()
-        elif choice == '5': break
\ No newline at end of file
+        if choice == '5':
+            break
+        action = menu.get(choice)
+        if action:
+            # Actions that read the graph or entry files flush pending writes
+            # themselves, so the others don't wait on a background ingestion
+            action()
+    
+    stats = agent.llm_stats_summary()
+    if stats:
+        print(stats)
+    agent._io_pool.shutdown(wait=True)
\ No newline at end of file
@@ -7,34 +7,60 @@ through the ingestion pipeline to populate the reflection_graph.json.
 
 import os
 import re
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 from graph_manager import GraphManager
 from ingestion_pipeline import IngestionPipeline
+from llm_cache import LLMCache
+
+# Concurrent extraction requests. Only the LLM calls run on the pool;
+# the graph is updated on the main thread, in file order.
+BACKFILL_WORKERS = 8
+# Transcripts per extraction request. Kept small so a batch's combined
+# extractions fit the model's output limit.
+BACKFILL_BATCH_SIZE = 4
+
+CONVERSATION_HEADER = b'# Full Conversation'
 
 def extract_conversation_from_md(filepath):
-    """Extract the full conversation text from a markdown file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Split by the "# Full Conversation" header
-    parts = content.split('# Full Conversation', 1)
-    if len(parts) > 1:
-        return parts[1].strip()
-    else:
-        # If no header found, return everything after frontmatter
-        parts = content.split('---', 2)
-        if len(parts) > 2:
-            return parts[2].strip()
-        return content.strip()
+    """
+    Extract the full conversation text from a markdown file. The file is
+    memory-mapped and only the bytes after the header are decoded.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Everything after the "# Full Conversation" header
+            start = mm.find(CONVERSATION_HEADER)
+            if start != -1:
+                start += len(CONVERSATION_HEADER)
+            else:
+                # If no header found, everything after the frontmatter
+                first = mm.find(b'---')
+                second = mm.find(b'---', first + 3) if first != -1 else -1
+                start = second + 3 if second != -1 else 0
+            return mm[start:].decode('utf-8').strip()
+
+def _read_conversation(filepath):
+    """(conversation, None), or (None, error) if the file can't be read."""
+    try:
+        return extract_conversation_from_md(filepath), None
+    except Exception as e:
+        return None, e
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     daily_dir = os.path.join(script_dir, "daily")
     graph_path = os.path.join(script_dir, "reflection_graph.json")
+    cache_path = os.path.join(script_dir, "llm_cache.sqlite")
     
     # Initialize Graph Components
     print("Initializing Graph Manager...")
     graph_manager = GraphManager(graph_path)
-    ingestion_pipeline = IngestionPipeline(graph_manager)
+    # Re-runs skip transcripts already extracted (exact matches only; LLM_CACHE=0 disables)
+    llm_cache = LLMCache(cache_path, semantic=False) if os.getenv("LLM_CACHE", "1") == "1" else None
+    ingestion_pipeline = IngestionPipeline(graph_manager, llm_cache)
     
     # Get all markdown files
     md_files = sorted([f for f in os.listdir(daily_dir) if f.endswith('.md')])
@@ -45,28 +71,49 @@ def main():
     
     print(f"\nFound {len(md_files)} reflection files to process.\n")
     
-    # Process each file
-    for i, filename in enumerate(md_files, 1):
-        filepath = os.path.join(daily_dir, filename)
-        print(f"[{i}/{len(md_files)}] Processing {filename}...")
-        
-        try:
-            conversation = extract_conversation_from_md(filepath)
+    # Files are read on their own pool while earlier batches are already with
+    # the LLM; each batch is submitted as soon as its files have been read
+    sessions = []
+    pending = []  # Futures of extract_batch, in file order
+    with ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as readers, \
+         ThreadPoolExecutor(max_workers=BACKFILL_WORKERS) as pool:
+        paths = [os.path.join(daily_dir, f) for f in md_files]
+        batch = []
+        for filename, (conversation, error) in zip(md_files, readers.map(_read_conversation, paths)):
+            if error:
+                print(f"  ❌ {filename}: {error}")
+                continue
             
             if not conversation or len(conversation) < 50:
-                print(f"  ⚠️  Skipped (conversation too short or empty)")
+                print(f"  ⚠️  Skipped {filename} (conversation too short or empty)")
                 continue
+            sessions.append((filename, conversation))
+            batch.append((filename, conversation))
+            if len(batch) == BACKFILL_BATCH_SIZE:
+                pending.append(pool.submit(ingestion_pipeline.extract_batch, batch))
+                batch = []
+        if batch:
+            pending.append(pool.submit(ingestion_pipeline.extract_batch, batch))
+        
+        # Ingest each result as its batch comes back, in file order.
+        # Additions are held until the end, then written as one snapshot
+        with graph_manager.batch():
+            extractions = (data for future in pending for data in future.result())
+            for i, ((filename, conversation), data) in enumerate(zip(sessions, extractions), 1):
+                print(f"[{i}/{len(sessions)}] Processing {filename}...")
+                if not data:
+                    print(f"  ❌ Error: extraction failed")
+                    continue
+                
+                try:
+                    # Ingest into graph
+                    ingestion_pipeline.add_extraction(data)
+                    print(f"  ✅ Ingested ({len(conversation)} chars)")
+                except Exception as e:
+                    print(f"  ❌ Error: {e}")
             
-            # Ingest into graph
-            ingestion_pipeline.process_session(conversation, session_id=filename)
-            print(f"  ✅ Ingested ({len(conversation)} chars)")
-            
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-    
-    # Save the graph
-    print("\nSaving graph...")
-    graph_manager.save_graph()
+            print("\nSaving graph...")
+            graph_manager.save_graph()
     
     # Print summary
     total_nodes = len(graph_manager.graph.nodes())
@@ -5,12 +5,17 @@ import json
 import os
 import requests
 import re
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Optional
 
 # Add parent directory to path for imports when run as script
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from src import json_utils
+from src.llm_cache import LLMCache
 from src.tracking_manager import TrackingManager
 from src.tracking_schema import Experiment
 
@@ -20,6 +25,11 @@ load_dotenv()
 # --- CONFIGURATION (Duplicate from LLM_reflection.py for standalone usage) ---
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
 DEEPSEEK_URL = "https://api.deepseek.com/chat/completions"
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"  # Set LLM_CACHE=0 to always call the API
+HELP_CONTEXT = "I need help/motivation."  # What a bare "?" asks the coach
+
+# Step numbering like "1) " or "2. " in single-line protocols
+_STEP_PREFIX_RE = re.compile(r'\d+[\.\)]\s')
 
 class SmartExperimentPlayer:
     """
@@ -28,6 +38,17 @@ class SmartExperimentPlayer:
     """
     def __init__(self, api_key: str = DEEPSEEK_API_KEY):
         self.api_key = api_key
+        # Tips are reused for the same step and question (exact matches only),
+        # sharing the reflection app's cache file
+        self.llm_cache = None
+        if LLM_CACHE_ENABLED:
+            data_dir = os.path.join(ROOT_DIR, "data")
+            os.makedirs(data_dir, exist_ok=True)
+            self.llm_cache = LLMCache(os.path.join(data_dir, "llm_cache.sqlite"), semantic=False)
+        self._session = requests.Session()  # Keep-alive across tips in one playback
+        self._session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        # No retries: a failed tip is reported at once rather than stalling the step
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
     def parse_steps(self, description: str) -> List[str]:
         """Split description into actionable steps."""
@@ -47,23 +68,20 @@ class SmartExperimentPlayer:
 
         # Scenario B: Single line block
         # Split by number patterns like "1)", "2.", "3-"
-        parts = re.split(r'(\d+[\.\)]\s)', description)
-        if len(parts) > 1:
-            current_step = ""
-            for part in parts:
-                if re.match(r'\d+[\.\)]\s', part):
-                    if current_step: steps.append(current_step.strip())
-                    current_step = part.strip() # Start new step with number
-                else:
-                    current_step += " " + part
-            if current_step: steps.append(current_step.strip())
+        # One pass: each step runs from its number to the next one
+        starts = [m.start() for m in _STEP_PREFIX_RE.finditer(description)]
+        if starts:
+            bounds = [0] + starts + [len(description)]
+            for start, end in zip(bounds, bounds[1:]):
+                step = description[start:end].strip()
+                if step: steps.append(step)
             return steps
 
         # Scenario C: Just text
         return [description.strip()]
 
-    def ask_ai_coach(self, step_text: str, user_context: str = "") -> str:
-        """Call DeepSeek for a quick tip."""
+    def ask_ai_coach(self, step_text: str, user_context: str = "", bypass_cache: bool = False) -> str:
+        """Call DeepSeek for a quick tip; `bypass_cache` forces a fresh one."""
         if not self.api_key:
             return "AI Coach unavailable (Missing API Key)."
 
@@ -84,14 +102,22 @@ class SmartExperimentPlayer:
             "temperature": 0.7
         }
         
+        messages = payload["messages"]
+        if self.llm_cache and not bypass_cache:
+            cached = self.llm_cache.get(messages, temperature=payload["temperature"])
+            if cached is not None:
+                return cached
+
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-            response = requests.post(DEEPSEEK_URL, json=payload, headers=headers, timeout=5)
+            response = self._session.post(DEEPSEEK_URL, json=payload, timeout=5)
             response.raise_for_status()
-            data = response.json()
-            return data['choices'][0]['message']['content'].strip()
+            data = json_utils.loads(response.content)
+            tip = data['choices'][0]['message']['content'].strip()
         except Exception as e:
             return f"(AI Error: {str(e)})"
+        if self.llm_cache:
+            self.llm_cache.put(messages, tip)
+        return tip
 
     def play(self, experiment: Experiment):
         print(f"\n> NUDGE: {experiment.title}")
@@ -102,63 +128,83 @@ class SmartExperimentPlayer:
         session_notes = []
 
         print(f"Goal: {experiment.success_criteria}")
-        input("\n[Press Enter to Start Protocol]")
-
-        for i, step in enumerate(steps, 1):
-            while True:
-                print("\n" + "-"*40)
-                print(f"STEP {i}/{total}")
-                print(f"👉 {step}")
-                print("-" * 40)
-                print("[Enter] Next | [?] Help | [Text] Add Note")
+        # While the user reads a step, fetch the default tip for the next one so
+        # a "?" there is answered at once. Only worth it when tips are cached.
+        prefetch = ThreadPoolExecutor(max_workers=2) if self.llm_cache and self.api_key else None
+        prefetched = {}
+        try:
+            if prefetch and steps:
+                prefetched[1] = prefetch.submit(self.ask_ai_coach, steps[0], HELP_CONTEXT)
+            input("\n[Press Enter to Start Protocol]")
+
+            for i, step in enumerate(steps, 1):
+                if prefetch and i < total:
+                    prefetched[i + 1] = prefetch.submit(self.ask_ai_coach, steps[i], HELP_CONTEXT)
+                while True:
+                    print("\n" + "-"*40)
+                    print(f"STEP {i}/{total}")
+                    print(f"👉 {step}")
+                    print("-" * 40)
+                    print("[Enter] Next | [?] Help | [Text] Add Note")
                 
-                user_input = input("   > ").strip()
-
-                if user_input == "":
-                    # Next step
-                    break
-                elif user_input == "?" or user_input.lower() == "help":
-                    print("   🤖 calling coach...")
-                    advice = self.ask_ai_coach(step, "I need help/motivation.")
-                    print(f"   💡 COACH: {advice}")
-                else:
-                    # Treat as note or specific question
-                    # Heuristic: if it ends with ?, ask AI. If not, log it.
-                    if user_input.endswith("?"):
-                         print("   🤖 calling coach...")
-                         advice = self.ask_ai_coach(step, user_input)
-                         print(f"   💡 COACH: {advice}")
+                    user_input = input("   > ").strip()
+
+                    if user_input == "":
+                        # Next step
+                        break
+                    elif user_input == "?" or user_input.lower() == "help":
+                        print("   🤖 calling coach...")
+                        # Use the prefetched tip if there is one (it may still be in flight)
+                        future = prefetched.pop(i, None)
+                        advice = future.result() if future else self.ask_ai_coach(step, HELP_CONTEXT)
+                        print(f"   💡 COACH: {advice}")
                     else:
-                        print("   📝 Note added.")
-                        session_notes.append(f"Step {i}: {user_input}")
+                        # Treat as note or specific question
+                        # Heuristic: if it ends with ?, ask AI. If not, log it.
+                        if user_input.endswith("?"):
+                             print("   🤖 calling coach...")
+                             advice = self.ask_ai_coach(step, user_input)
+                             print(f"   💡 COACH: {advice}")
+                        else:
+                            print("   📝 Note added.")
+                            session_notes.append(f"Step {i}: {user_input}")
+        finally:
+            # Also on Ctrl-C or an error, so no prefetch outlives the playback
+            if prefetch:
+                prefetch.shutdown(wait=False, cancel_futures=True)
 
         print("\n🎉 Protocol Complete!")
         return "\n".join(session_notes)
 
 class ExperimentManager:
-    def __init__(self):
-        self.tm = TrackingManager()
+    def __init__(self, tracking_manager: Optional[TrackingManager] = None):
+        # Pass the caller's TrackingManager to share its in-memory data
+        self.tm = tracking_manager or TrackingManager()
         self.player = SmartExperimentPlayer()
 
-    def list_experiments(self, active_only: bool = True):
-        experiments = self.tm.get_active_experiments() if active_only else self.tm._load_jsonl(self.tm.experiments_file)
-        if hasattr(experiments, '__iter__') and not isinstance(experiments, list):
-             experiments = list(experiments)
-        
-        if not active_only and experiments and isinstance(experiments[0], dict):
-             experiments = [Experiment.from_dict(e) for e in experiments]
-
-        if not experiments:
-            print("No active experiments found.")
+    def _iter_experiments(self, active_only: bool):
+        """Yield experiments lazily; the full history is streamed from disk."""
+        if active_only:
+            yield from self.tm.get_active_experiments()
             return
+        yield from map(Experiment.from_dict, self.tm._iter_jsonl(self.tm.experiments_file))
 
-        print(f"\n[LIST] Found {len(experiments)} experiments:")
-        for i, exp in enumerate(experiments, 1):
+    def list_experiments(self, active_only: bool = True):
+        count = 0
+        for i, exp in enumerate(self._iter_experiments(active_only), 1):
+            if i == 1:
+                print("\n[LIST] Experiments:")
+            count = i
             status_icon = "[ACT]" if exp.status == "active" else "[TST]" if exp.status == "testing" else "[...]"
             print(f"{i}. {status_icon} [{exp.id}] {exp.title}")
             print(f"   Goal: {exp.success_criteria[:60]}...")
             print(f"   Stats: {exp.successful_days()} successes | Score: {exp.cumulative_progress()}")
 
+        if count:
+            print(f"\nFound {count} experiments.")
+        else:
+            print("No active experiments found.")
+
     def add_experiment(self, title: str, description: str, success_criteria: str, habit_id: Optional[str] = None):
         exp = self.tm.create_experiment(
             title=title,
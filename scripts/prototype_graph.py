@@ -1,5 +1,5 @@
 import networkx as nx
-import json
+import json_utils
 from datetime import datetime
 from graph_schema import (
     UserNode, BeliefNode, EventNode, Edge, EdgeType, NodeType
@@ -72,14 +72,14 @@ def run_prototype():
     # 5. Serialization (Save to JSON)
     print("\n--- Serialization ---")
     data = nx.node_link_data(G)
-    with open("graph_prototype.json", "w") as f:
-        json.dump(data, f, indent=2)
+    with open("graph_prototype.json", "wb") as f:
+        f.write(json_utils.dumpb(data, indent=True))
     print("Graph saved to graph_prototype.json")
 
     # 6. Deserialization (Load back)
     print("\n--- Deserialization ---")
-    with open("graph_prototype.json", "r") as f:
-        data_loaded = json.load(f)
+    with open("graph_prototype.json", "rb") as f:
+        data_loaded = json_utils.loads(f.read())
     
     G_loaded = nx.node_link_graph(data_loaded)
     print(f"Loaded Graph: {G_loaded.number_of_nodes()} nodes, {G_loaded.number_of_edges()} edges.")
@@ -9,8 +9,10 @@ def verify_system():
     
     # 1. Setup
     db_path = "test_graph.json"
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # Remove the write-ahead log too, or reopening would replay the last run
+    for path in (db_path, db_path + ".wal"):
+        if os.path.exists(path):
+            os.remove(path)
     
     gm = GraphManager(db_path)
     pipeline = IngestionPipeline(gm)
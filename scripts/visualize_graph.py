@@ -1,38 +1,48 @@
-import json
 import os
+import sys
 import webbrowser
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import json_utils  # orjson when installed
+from src.graph_manager import GraphManager
+
+# Node color by type (matches the legend); other types use DEFAULT_COLOR
+TYPE_COLORS = {
+    "Belief": "#FFD700",   # Gold
+    "Event": "#90EE90",    # Light Green
+    "Emotion": "#FFB6C1",  # Light Pink
+    "Person": "#FFA07A",   # Light Salmon
+}
+DEFAULT_COLOR = "#97C2FC"  # Default Blue
+MAX_LABEL_LEN = 20
+
 def generate_visualization():
     # Paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     json_path = os.path.join(script_dir, "reflection_graph.json")
     html_path = os.path.join(script_dir, "reflection_graph.html")
 
-    # Load Graph Data
-    if not os.path.exists(json_path):
+    # Load Graph Data through GraphManager, so additions still in the
+    # write-ahead log (not yet compacted into the snapshot) are included
+    if not (os.path.exists(json_path) or os.path.exists(json_path + ".wal")):
         print(f"Error: {json_path} not found.")
         return
 
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-
-    nodes = data.get("nodes", [])
-    links = data.get("links", [])
+    graph = GraphManager(json_path).graph
+    nodes = [{**data, "id": node_id} for node_id, data in graph.nodes(data=True)]
+    links = [{**data, "source": source, "target": target}
+             for source, target, data in graph.edges(data=True)]
 
     # Prepare Nodes for Vis.js
     vis_nodes = []
     for node in nodes:
         # Determine color/shape based on type
         node_type = node.get("type", "Unknown")
-        color = "#97C2FC" # Default Blue
-        if node_type == "Belief": color = "#FFD700" # Gold
-        elif node_type == "Event": color = "#90EE90" # Light Green
-        elif node_type == "Emotion": color = "#FFB6C1" # Light Pink
-        elif node_type == "Person": color = "#FFA07A" # Light Salmon
+        color = TYPE_COLORS.get(node_type, DEFAULT_COLOR)
         
         # Label is text (truncated)
         label = node.get("text", node.get("description", "Node"))
-        if len(label) > 20: label = label[:20] + "..."
+        if len(label) > MAX_LABEL_LEN: label = label[:MAX_LABEL_LEN] + "..."
         
         # Tooltip is full text
         title = f"<b>{node_type}</b><br>{node.get('text', node.get('description', ''))}"
@@ -99,10 +109,10 @@ def generate_visualization():
 
         <script type="text/javascript">
             // create an array with nodes
-            var nodes = new vis.DataSet({json.dumps(vis_nodes)});
+            var nodes = new vis.DataSet({json_utils.dumps(vis_nodes)});
 
             // create an array with edges
-            var edges = new vis.DataSet({json.dumps(vis_edges)});
+            var edges = new vis.DataSet({json_utils.dumps(vis_edges)});
 
             // create a network
             var container = document.getElementById('mynetwork');
@@ -1,10 +1,36 @@
 # Reflections src package
 # Core modules for the reflection coach system
+#
+# Re-exports are resolved on first access (PEP 562), so importing one
+# submodule does not also import networkx, yaml, etc. for the others.
 
-from .tracking_manager import TrackingManager
-from .tracking_schema import TargetGoal, Habit, Experiment, ProgressEntry
-from .graph_manager import GraphManager
-from .graph_schema import NodeType, EdgeType, Node, Edge
-from .context_manager import ContextManager
-from .skill_loader import SkillLoader
-from .ingestion_pipeline import IngestionPipeline
+import importlib
+
+_EXPORTS = {
+    "TrackingManager": ".tracking_manager",
+    "TargetGoal": ".tracking_schema",
+    "Habit": ".tracking_schema",
+    "Experiment": ".tracking_schema",
+    "ProgressEntry": ".tracking_schema",
+    "GraphManager": ".graph_manager",
+    "NodeType": ".graph_schema",
+    "EdgeType": ".graph_schema",
+    "Node": ".graph_schema",
+    "Edge": ".graph_schema",
+    "ContextManager": ".context_manager",
+    "ConversationWindow": ".context_manager",
+    "SkillLoader": ".skill_loader",
+    "IngestionPipeline": ".ingestion_pipeline",
+    "LLMCache": ".llm_cache",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -8,13 +8,18 @@ Builds rich context windows for reflection prompts by combining:
 - Graph context via ego_walk
 - Weekly focus
 - Marginal gains status
+
+Also provides ConversationWindow, which bounds the chat history sent to
+the LLM with a rolling summary of older turns.
 """
 
 import os
 import json
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Callable
+from . import json_utils
 from .tracking_manager import TrackingManager
 from .tracking_schema import TargetGoal, Habit, Experiment
 
@@ -31,6 +36,108 @@ class SessionContext:
     suggested_followups: List[str] = field(default_factory=list)
 
 
+HISTORY_SUMMARY_PROMPT = """
+Summarize the earlier part of this coaching conversation in a few compact sentences.
+Keep what the user shared (situation, feelings, insights, decisions) and any open questions.
+Output ONLY the summary.
+"""
+
+
+class ConversationWindow:
+    """
+    Bounded view of a chat history for LLM calls.
+
+    `transcript` keeps every message for saving. `messages` (what gets sent)
+    holds a rolling summary of older turns plus the most recent turns, so
+    prompt size stays bounded in long sessions.
+
+    With an `executor`, folds run in the background and the turns stay in
+    `messages` until the summary arrives.
+    """
+    
+    def __init__(self, summarize: Callable[[str, str], str],
+                 max_turns: int = 8, keep_turns: int = 4,
+                 executor: Optional[Executor] = None):
+        """
+        Initialize the window.
+        
+        Args:
+            summarize: LLM call taking (system_prompt, text); a result starting
+                with "Error:" is treated as a failure and the turns are kept
+            max_turns: Fold older turns once more than this many are held
+            keep_turns: Number of recent turns kept verbatim after a fold
+            executor: Runs folds off the calling thread; None folds inline
+        """
+        self.summarize = summarize
+        self.max_turns = max_turns
+        self.keep_turns = keep_turns
+        self.executor = executor
+        self._pending = None  # (future, cut) of a background fold
+        self.transcript: List[Dict[str, str]] = []
+        self._transcript_lines: List[str] = []  # `role: content`, formatted on append
+        self.summary = ""
+        self._recent: List[Dict[str, str]] = []
+    
+    def __len__(self) -> int:
+        return len(self.transcript)
+    
+    def append(self, user_msg: str, assistant_msg: str) -> None:
+        """Record one user/assistant turn, folding older turns if needed."""
+        turn = [{"role": "user", "content": user_msg},
+                {"role": "assistant", "content": assistant_msg}]
+        self.transcript.extend(turn)
+        self._transcript_lines.append(f"user: {user_msg}")
+        self._transcript_lines.append(f"assistant: {assistant_msg}")
+        self._recent.extend(turn)
+        self._apply_pending()
+        if len(self._recent) > 2 * self.max_turns and self._pending is None:
+            self._fold()
+    
+    def _fold(self) -> None:
+        """Replace all but the last `keep_turns` turns with an updated summary."""
+        cut = len(self._recent) - 2 * self.keep_turns
+        older = self._recent[:cut]
+        text = "\n".join(f"{m['role']}: {m['content']}" for m in older)
+        if self.summary:
+            text = f"Summary so far: {self.summary}\n{text}"
+        
+        if self.executor is None:
+            self._finish_fold(self.summarize(HISTORY_SUMMARY_PROMPT, text), cut)
+        else:
+            self._pending = (self.executor.submit(self.summarize, HISTORY_SUMMARY_PROMPT, text), cut)
+    
+    def _apply_pending(self) -> None:
+        """Apply a background fold once its summary is ready."""
+        if self._pending is None or not self._pending[0].done():
+            return
+        future, cut = self._pending
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception:
+            summary = None
+        self._finish_fold(summary, cut)
+    
+    def _finish_fold(self, summary: Optional[str], cut: int) -> None:
+        """Swap the first `cut` recent messages for `summary`."""
+        if not summary or summary.startswith("Error:"):
+            return  # Keep the turns; retried on the next append
+        self.summary = summary.strip()
+        self._recent = self._recent[cut:]
+    
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """Messages to send: the rolling summary (if any) then recent turns."""
+        self._apply_pending()
+        if not self.summary:
+            return self._recent
+        return [{"role": "system", "content": f"Prior conversation summary: {self.summary}"}] + self._recent
+    
+    def transcript_text(self) -> str:
+        """Full conversation as `role: content` lines."""
+        return "\n".join(self._transcript_lines)
+
+
 class ContextManager:
     """
     Builds and manages context windows for reflection sessions.
@@ -57,11 +164,20 @@ class ContextManager:
         # Use provided managers or create new ones
         self.tracking_manager = tracking_manager or TrackingManager(base_dir)
         self.graph_manager = graph_manager
+        
+        # Graph context accumulated over the current session
+        self._session_anchor_ids: Set[str] = set()
+        self._session_graph_context: List[str] = []
     
     def set_graph_manager(self, graph_manager):
         """Set or update the graph manager."""
         self.graph_manager = graph_manager
     
+    def start_session(self) -> None:
+        """Reset the per-session graph context at the start of a session."""
+        self._session_anchor_ids.clear()
+        self._session_graph_context.clear()
+    
     # ==================== SESSION MEMORY ====================
     
     def load_last_session(self) -> Dict[str, Any]:
@@ -69,7 +185,7 @@ class ContextManager:
         if os.path.exists(self.last_session_file):
             try:
                 with open(self.last_session_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    return json_utils.load(f)
             except (json.JSONDecodeError, IOError):
                 pass
         return {}
@@ -98,14 +214,14 @@ class ContextManager:
         }
         
         with open(self.last_session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2)
+            json_utils.dump(session_data, f, indent=True)
     
     def load_weekly_focus(self) -> str:
         """Load the weekly focus from context_memory.json."""
         if os.path.exists(self.weekly_context_file):
             try:
                 with open(self.weekly_context_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                    data = json_utils.load(f)
                     return data.get("focus_for_next_week", "")
             except (json.JSONDecodeError, IOError):
                 pass
@@ -142,18 +258,29 @@ class ContextManager:
         
         # 5. Get graph context via ego_walk (if graph manager available)
         if self.graph_manager and user_input:
-            anchors = self.graph_manager.find_nodes_by_text(user_input)
-            anchor_ids = [n['id'] for n in anchors[:3]]
-            if anchor_ids:
-                context.graph_context = self.graph_manager.ego_walk(anchor_ids)
-            else:
-                context.graph_context = "No specific past context found."
+            context.graph_context = self._accumulate_graph_context(user_input)
         
         # 6. Generate suggested follow-ups
         context.suggested_followups = self._generate_followup_suggestions(context)
         
         return context
     
+    def _accumulate_graph_context(self, user_input: str) -> str:
+        """
+        Extend the session's graph context with anchors not seen yet this session.
+        Only new anchors are walked, so the context grows monotonically and
+        repeated inputs cost one text lookup instead of a full ego_walk.
+        """
+        anchors = self.graph_manager.find_nodes_by_text(user_input)
+        new_ids = [n['id'] for n in anchors[:3] if n['id'] not in self._session_anchor_ids]
+        if new_ids:
+            self._session_anchor_ids.update(new_ids)
+            self._session_graph_context.append(self.graph_manager.ego_walk(new_ids))
+        
+        if not self._session_graph_context:
+            return "No specific past context found."
+        return "\n".join(self._session_graph_context)
+    
     def _generate_followup_suggestions(self, context: SessionContext) -> List[str]:
         """Generate natural language follow-up suggestions."""
         suggestions = []
@@ -223,8 +350,13 @@ class ContextManager:
         Returns:
             Formatted string ready for LLM system prompt injection
         """
-        ctx = self.build_session_context(user_input)
-        
+        return self.format_context_block(self.build_session_context(user_input))
+    
+    def format_context_block(self, ctx: SessionContext) -> str:
+        """
+        Format an already built SessionContext as the context block.
+        Lets callers that also need the SessionContext build it only once.
+        """
         sections = []
         
         # Active Goals
@@ -345,6 +477,70 @@ if __name__ == "__main__":
         assert "Test Experiment" in exp_fmt, "Experiment formatting failed"
         print("  ✓ Prompt formatting")
         
+        # Test incremental session graph context
+        class StubGraph:
+            def __init__(self):
+                self.walks = []
+            def find_nodes_by_text(self, text):
+                return [{'id': w} for w in text.split()]
+            def ego_walk(self, ids):
+                self.walks.append(list(ids))
+                return f"walk({','.join(ids)})"
+        
+        stub = StubGraph()
+        cm.set_graph_manager(stub)
+        cm.start_session()
+        assert cm.build_session_context("a b").graph_context == "walk(a,b)"
+        assert cm.build_session_context("b c").graph_context == "walk(a,b)\nwalk(c)"
+        assert stub.walks == [['a', 'b'], ['c']], "Seen anchors were walked again"
+        cm.start_session()
+        assert cm.build_session_context("zzz").graph_context == "walk(zzz)"
+        print("  ✓ Incremental session graph context")
+        
+        # Test conversation window folding
+        folds = []
+        def fake_summarize(system_prompt, text):
+            folds.append(text)
+            return f"summary#{len(folds)}"
+        
+        window = ConversationWindow(fake_summarize, max_turns=3, keep_turns=1)
+        for i in range(3):
+            window.append(f"u{i}", f"a{i}")
+        assert len(folds) == 0 and len(window.messages) == 6, "Folded too early"
+        window.append("u3", "a3")
+        assert folds == ["user: u0\nassistant: a0\nuser: u1\nassistant: a1\nuser: u2\nassistant: a2"]
+        assert window.messages[0]["content"] == "Prior conversation summary: summary#1"
+        assert [m["content"] for m in window.messages[1:]] == ["u3", "a3"]
+        assert len(window) == 8, "Transcript should keep every message"
+        assert window.transcript_text().startswith("user: u0\nassistant: a0\nuser: u1"), "Transcript text wrong"
+        for i in range(4, 7):
+            window.append(f"u{i}", f"a{i}")
+        assert folds[1].startswith("Summary so far: summary#1\nuser: u3"), "Summary not rolled forward"
+        
+        failing = ConversationWindow(lambda p, t: "Error: LLM failed.", max_turns=1, keep_turns=1)
+        failing.append("u0", "a0")
+        failing.append("u1", "a1")
+        assert len(failing.messages) == 4 and not failing.summary, "Failed fold dropped turns"
+        
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        release = threading.Event()
+        def slow_summarize(system_prompt, text):
+            release.wait()
+            return "background summary"
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            background = ConversationWindow(slow_summarize, max_turns=1, keep_turns=1, executor=pool)
+            background.append("u0", "a0")
+            background.append("u1", "a1")
+            background.append("u2", "a2")
+            assert len(background.messages) == 6, "Turns dropped before the summary arrived"
+            release.set()
+            background._pending[0].result()
+            assert [m["content"] for m in background.messages] == [
+                "Prior conversation summary: background summary", "u1", "a1", "u2", "a2"
+            ], "Background fold not applied"
+        print("  ✓ Conversation window folding")
+        
         print("\nAll context_manager tests passed! ✓")
     else:
         print("Usage: python context_manager.py --test")
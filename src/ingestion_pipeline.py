@@ -1,9 +1,10 @@
-import json
 import os
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
+from . import json_utils
 from .graph_manager import GraphManager
+from .llm_cache import LLMCache
 from .graph_schema import (
     Node, UserNode, BeliefNode, EventNode, EmotionNode, 
     TopicNode, UtteranceNode, DistortionNode, 
@@ -13,6 +14,11 @@ from .graph_schema import (
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+BATCH_MAX_TOKENS = 8192  # deepseek-chat's output ceiling; a batch reply holds several extractions
+
+# Keep-alive session so repeated ingestions reuse the TLS connection
+_SESSION = requests.Session()
+_SESSION.headers.update({"Authorization": f"Bearer {DEEPSEEK_API_KEY}"})
 
 EXTRACTION_SYSTEM_PROMPT = """
 You are an expert Graph Database Architect and Psychoanalyst.
@@ -50,17 +56,49 @@ JSON Format:
 Use "source_index" and "target_index" to refer to the position in the "nodes" array (0-indexed).
 """
 
+# Appended to EXTRACTION_SYSTEM_PROMPT when several transcripts share one request
+BATCH_EXTRACTION_SUFFIX = """
+Batch mode: the input is a JSON array of {"session_id": ..., "text": ...} transcripts.
+Extract each session independently (indices refer to that session's own "nodes") and output:
+{"sessions": [{"session_id": "...", "nodes": [...], "edges": [...]}]}
+"""
+
+def _read_stream(response) -> str:
+    """Join the content deltas of a server-sent-events completion."""
+    chunks = []
+    for line in response.iter_lines():
+        # Skip blank separators and ": keep-alive" comments
+        if not line.startswith(b"data: "):
+            continue
+        data = line[len(b"data: "):]
+        if data == b"[DONE]":
+            continue  # Read to the end so the connection returns to the pool
+        choices = json_utils.loads(data).get('choices')
+        if choices:
+            chunks.append(choices[0].get('delta', {}).get('content') or "")
+    return "".join(chunks)
+
 class IngestionPipeline:
-    def __init__(self, graph_manager: GraphManager):
+    def __init__(self, graph_manager: GraphManager, llm_cache: Optional[LLMCache] = None):
+        """
+        Args:
+            graph_manager: Graph the extractions are added to
+            llm_cache: Optional response cache, so re-extracting an unchanged
+                       transcript (e.g. a backfill re-run) skips the request.
+                       Use an exact-only cache (semantic=False): a similar
+                       transcript must not reuse another session's extraction.
+        """
         self.graph_manager = graph_manager
+        self.llm_cache = llm_cache
 
-    def _call_llm(self, user_text: str) -> Dict[str, Any]:
+    def _call_llm(self, user_text: str, system_prompt: str = EXTRACTION_SYSTEM_PROMPT,
+                  max_tokens: Optional[int] = None) -> Dict[str, Any]:
         if not DEEPSEEK_API_KEY:
             print("Error: DEEPSEEK_API_KEY not set.")
             return {}
 
         messages = [
-            {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_text}
         ]
 
@@ -68,17 +106,64 @@ class IngestionPipeline:
             "model": "deepseek-chat",
             "messages": messages,
             "temperature": 0.1, # Low temperature for structured output
-            "response_format": {"type": "json_object"}
+            "response_format": {"type": "json_object"},
+            # Streamed so the body is decoded as it arrives, and the timeout
+            # bounds each gap between chunks rather than the whole (long) reply
+            "stream": True
         }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        cached = self.llm_cache.get(messages, temperature=payload["temperature"]) if self.llm_cache else None
+        if cached is not None:
+            try:
+                return json_utils.loads(cached)
+            except ValueError:
+                pass  # Not valid JSON; request it again
 
         try:
-            response = requests.post(DEEPSEEK_API_URL, headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"}, json=payload, timeout=120)
-            response.raise_for_status()
-            content = response.json()['choices'][0]['message']['content']
-            return json.loads(content)
+            with _SESSION.post(DEEPSEEK_API_URL, json=payload, timeout=120, stream=True) as response:
+                response.raise_for_status()
+                content = _read_stream(response)
+            data = json_utils.loads(content)
         except Exception as e:
             print(f"Ingestion LLM Error: {e}")
             return {}
+        if self.llm_cache:
+            self.llm_cache.put(messages, content)  # Only replies that parsed
+        return data
+
+    def extract(self, full_transcript: str) -> Dict[str, Any]:
+        """
+        Run only the LLM extraction for a transcript ({} on failure).
+        Makes no graph changes, so several can run on worker threads; pass
+        each result to add_extraction on the thread that owns the graph.
+        """
+        return self._call_llm(full_transcript)
+
+    def extract_batch(self, sessions: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Extract several (session_id, transcript) pairs with one LLM request.
+        Returns one result per session, in order. Sessions missing from the
+        reply (or a failed request) are retried one at a time with `extract`.
+        Like `extract`, makes no graph changes.
+        """
+        if len(sessions) == 1:
+            return [self.extract(sessions[0][1])]
+        batch = json_utils.dumps([{"session_id": sid, "text": text} for sid, text in sessions])
+        data = self._call_llm(batch, EXTRACTION_SYSTEM_PROMPT + BATCH_EXTRACTION_SUFFIX,
+                              max_tokens=BATCH_MAX_TOKENS)
+        by_id = {}
+        for result in data.get("sessions", []):
+            if isinstance(result, dict):
+                by_id[str(result.get("session_id"))] = result
+        return [by_id.get(sid) or self.extract(text) for sid, text in sessions]
+
+    def process_sessions_batch(self, sessions: List[Tuple[str, str]]):
+        """Ingest several (session_id, transcript) pairs using one extraction request."""
+        for data in self.extract_batch(sessions):
+            if data:
+                self.add_extraction(data)
 
     def process_session(self, full_transcript: str, session_id: str = "default"):
         """
@@ -96,7 +181,10 @@ class IngestionPipeline:
         data = self._call_llm(full_transcript)
         if not data:
             return
+        self.add_extraction(data)
 
+    def add_extraction(self, data: Dict[str, Any]):
+        """Create the nodes and edges of one extraction result in the graph."""
         extracted_nodes = []
         
         # 3. Create Extracted Nodes
@@ -122,13 +210,13 @@ class IngestionPipeline:
                 new_node = Node(type=NodeType.PERSON, properties={"name": n_data.get("name")})
             
             if new_node:
-                self.graph_manager.add_node(new_node)
                 extracted_nodes.append(new_node)
                 
                 # Optional: Link to a Session Node if we had one.
                 # For now, we just store the node.
 
         # 4. Create Edges between extracted nodes
+        new_edges = []
         for e_data in data.get("edges", []):
             src_idx = e_data.get("source_index")
             tgt_idx = e_data.get("target_index")
@@ -140,9 +228,13 @@ class IngestionPipeline:
                 
                 try:
                     edge_type = EdgeType[edge_type_str] # Convert string to Enum
-                    edge = Edge(src_node.id, tgt_node.id, edge_type)
-                    self.graph_manager.add_edge(edge)
+                    new_edges.append(Edge(src_node.id, tgt_node.id, edge_type))
                 except KeyError:
                     print(f"Unknown edge type: {edge_type_str}")
 
+        # Nodes and edges land in a single graph log append
+        with self.graph_manager.batch():
+            self.graph_manager.add_nodes(extracted_nodes)
+            self.graph_manager.add_edges(new_edges)
+
         print(f"Ingestion complete. Added {len(extracted_nodes)} nodes.")
@@ -0,0 +1,48 @@
+"""
+JSON Helpers
+============
+Thin wrappers that use orjson when it is installed and fall back to the
+standard library otherwise. All functions work with `str`, so call sites
+can keep opening files in text mode; `dumpb` returns UTF-8 bytes for call
+sites that write binary files.
+"""
+
+import json
+from typing import Any, IO
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used without it
+    orjson = None
+
+
+def loads(data) -> Any:
+    """Parse a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize to a JSON string; `indent` uses two spaces."""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option).decode('utf-8')
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, ensure_ascii=False)
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, skipping orjson's decode to str."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return dumps(obj, indent=indent).encode('utf-8')
+
+
+def load(f: IO[str]) -> Any:
+    """Parse a JSON document from an open file."""
+    return loads(f.read())
+
+
+def dump(obj: Any, f: IO[str], indent: bool = False) -> None:
+    """Serialize to an open file."""
+    f.write(dumps(obj, indent=indent))
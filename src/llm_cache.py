@@ -0,0 +1,273 @@
+"""
+LLM Response Cache
+==================
+On-disk cache for chat completions, stored in SQLite.
+
+Two lookup tiers:
+- Exact: SHA-256 of the full message list, answered from an in-process
+  dict before SQLite is queried
+- Semantic: cosine similarity of the final user turn, restricted to entries
+  sharing the same preceding messages (system prompt + history).
+  Only active when sentence-transformers is installed and the cache was
+  created with semantic=True (the default). Embeddings are
+  stored int8-quantized with a per-vector scale (4x smaller than float32).
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import importlib.util
+from array import array
+from operator import mul
+from typing import List, Optional, Dict, Any
+from . import json_utils
+
+# Optional: semantic lookups are skipped without it. Only checked here;
+# the (slow) import happens on the first embedding.
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # 384-d MiniLM
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class LLMCache:
+    """
+    Caches LLM responses keyed by the request messages.
+    Semantic matches require a higher similarity when sampling is non-deterministic.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 semantic_threshold: float = 0.92,
+                 sampled_threshold: float = 0.98,
+                 use_int8: bool = True, semantic: bool = True):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: SQLite file to store responses in
+            ttl_seconds: Entries older than this are ignored and pruned
+            semantic_threshold: Minimum cosine similarity for temperature=0 calls
+            sampled_threshold: Minimum cosine similarity for temperature>0 calls
+            use_int8: Store embeddings int8-quantized instead of float32
+            semantic: Allow near-duplicate hits; False keeps exact matches only
+                      (for requests where a similar input must not reuse a reply)
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.sampled_threshold = sampled_threshold
+        self.use_int8 = use_int8
+        self.semantic = semantic and HAS_SENTENCE_TRANSFORMERS
+        self._model = None
+        self._lock = threading.Lock()
+        self._memory: Dict[str, tuple] = {}  # key -> (response, created_at)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " prefix_key TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " embedding BLOB,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_prefix ON responses(prefix_key)"
+        )
+        self._conn.commit()
+
+    # ==================== KEYS ====================
+
+    @staticmethod
+    def _hash(messages: List[Dict[str, Any]]) -> str:
+        blob = json_utils.dumps(messages, sort_keys=True)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _embed(self, text: str, semantic: bool = True) -> Optional[bytes]:
+        """Return a packed unit-length embedding, or None if unavailable."""
+        if not (self.semantic and semantic):
+            return None
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        vec = self._model.encode(text, normalize_embeddings=True)
+        return self._pack([float(v) for v in vec])
+
+    def _pack(self, vec: List[float]) -> bytes:
+        """
+        Serialize an embedding. float32 layout is the raw vector; int8 layout
+        is a float32 scale followed by round(v / scale) per component.
+        """
+        if not self.use_int8:
+            return array('f', vec).tobytes()
+        scale = (max(abs(v) for v in vec) or 1.0) / 127
+        return array('f', [scale]).tobytes() + array('b', (round(v / scale) for v in vec)).tobytes()
+
+    def _unpack(self, blob: bytes) -> tuple:
+        """Inverse of `_pack`: (scale, components), scale 1.0 for float32."""
+        if not self.use_int8:
+            values = array('f')
+            values.frombytes(blob)
+            return 1.0, values
+        scale, values = array('f'), array('b')
+        scale.frombytes(blob[:4])
+        values.frombytes(blob[4:])
+        return scale[0], values
+
+    def _dot(self, a: bytes, b: bytes) -> float:
+        """Dot product of two embeddings packed in the current layout."""
+        return self._dot_unpacked(self._unpack(a), b)
+
+    def _dot_unpacked(self, query: tuple, b: bytes) -> float:
+        """Dot product of an already unpacked query with a packed embedding."""
+        scale_a, va = query
+        scale_b, vb = self._unpack(b)
+        # map(mul) runs the reduction in C, unlike a generator over zip()
+        return scale_a * scale_b * sum(map(mul, va, vb))
+
+    # ==================== LOOKUP ====================
+
+    def get(self, messages: List[Dict[str, Any]], temperature: float = 0.0,
+            semantic: bool = True) -> Optional[str]:
+        """
+        Look up a cached response for a message list.
+
+        Args:
+            messages: Full request messages; the last one is the user turn
+            temperature: Sampling temperature of the request
+            semantic: Allow a near-duplicate hit; pass False for requests whose
+                      reply is stored data (summaries, extractions)
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        cutoff = time.time() - self.ttl_seconds
+        key = self._hash(messages)
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit and hit[1] >= cutoff:
+                return hit[0]
+            
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ? AND created_at >= ?",
+                (key, cutoff)
+            ).fetchone()
+            if row:
+                self._memory[key] = row
+                return row[0]
+
+            if not (self.semantic and semantic):
+                return None
+            candidates = self._conn.execute(
+                "SELECT response, embedding FROM responses"
+                " WHERE prefix_key = ? AND created_at >= ? AND embedding IS NOT NULL",
+                (self._hash(messages[:-1]), cutoff)
+            ).fetchall()
+        if not candidates:
+            return None
+
+        query = self._embed(messages[-1]["content"])
+        unpacked = self._unpack(query)
+        # Rows stored in the other layout (use_int8 toggled) differ in size; skip them
+        scored = [(self._dot_unpacked(unpacked, emb), response)
+                  for response, emb in candidates if len(emb) == len(query)]
+        if not scored:
+            return None
+        threshold = self.semantic_threshold if temperature == 0 else self.sampled_threshold
+        best_score, best_response = max(scored)
+        return best_response if best_score >= threshold else None
+
+    def put(self, messages: List[Dict[str, Any]], response: str, semantic: bool = True) -> None:
+        """
+        Store a response and prune expired entries. With `semantic=False` no
+        embedding is stored, so the entry only ever answers exact lookups.
+        """
+        now = time.time()
+        key = self._hash(messages)
+        embedding = self._embed(messages[-1]["content"], semantic)
+        with self._lock:
+            self._memory[key] = (response, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, prefix_key, response, embedding, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, self._hash(messages[:-1]), response, embedding, now)
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._conn.commit()
+
+
+# --- INLINE TESTS ---
+if __name__ == "__main__":
+    import sys
+
+    if "--test" in sys.argv:
+        print("Running llm_cache tests...")
+
+        # Create isolated test directory
+        test_dir = os.path.join(os.path.dirname(__file__), "tests", "output")
+        os.makedirs(test_dir, exist_ok=True)
+        db_path = os.path.join(test_dir, "llm_cache.sqlite")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+        cache = LLMCache(db_path)
+        messages = [
+            {"role": "system", "content": "You are a coach."},
+            {"role": "user", "content": "I'm ready to review my week."}
+        ]
+
+        # Test miss then exact hit
+        assert cache.get(messages) is None, "Empty cache should miss"
+        cache.put(messages, "Great, let's start.")
+        assert cache.get(messages) == "Great, let's start.", "Exact hit failed"
+        print("  ✓ Exact-match lookup")
+
+        # Test different prefix does not hit
+        other = [{"role": "system", "content": "Different."}, messages[-1]]
+        assert cache.get(other) is None, "Different system prompt should miss"
+        print("  ✓ Prefix isolation")
+
+        # Test in-process tier answers without touching SQLite
+        cache._conn.execute("DELETE FROM responses")
+        assert cache.get(messages) == "Great, let's start.", "In-process hit failed"
+        cache._memory.clear()
+        assert cache.get(messages) is None, "Deleted row should miss"
+        cache.put(messages, "Great, let's start.")
+        print("  ✓ In-process exact tier")
+        
+        # Test persistence
+        cache2 = LLMCache(db_path)
+        assert cache2.get(messages) == "Great, let's start.", "Cache not persisted"
+        print("  ✓ SQLite persistence")
+
+        # Test TTL expiry
+        expired = LLMCache(db_path, ttl_seconds=-1)
+        assert expired.get(messages) is None, "Expired entry returned"
+        print("  ✓ TTL expiry")
+        
+        # Test int8 embedding packing
+        vec = [0.6, -0.8, 0.0]
+        packed = cache._pack(vec)
+        assert len(packed) == 4 + len(vec), "int8 layout should be scale + 1 byte/dim"
+        assert abs(cache._dot(packed, packed) - 1.0) < 0.02, "int8 self-similarity off"
+        float_cache = LLMCache(db_path, use_int8=False)
+        assert abs(float_cache._dot(float_cache._pack(vec), float_cache._pack(vec)) - 1.0) < 1e-6
+        print("  ✓ int8 embedding packing")
+        
+        # Test exact-only caches never embed
+        exact = LLMCache(db_path, semantic=False)
+        assert exact._embed("anything") is None, "Exact-only cache embedded"
+        assert exact.get(messages) == "Great, let's start.", "Exact-only cache missed"
+        assert cache._embed("anything", semantic=False) is None, "Exact-only call embedded"
+        assert cache.get(messages, semantic=False) == "Great, let's start.", "Exact-only call missed"
+        print("  ✓ Exact-only mode")
+
+        print("\nAll llm_cache tests passed! ✓")
+    else:
+        print("Usage: python llm_cache.py --test")
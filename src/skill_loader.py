@@ -8,6 +8,7 @@ Loads skill definitions from skills/ directory and provides:
 """
 
 import os
+import re
 import yaml
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
@@ -32,6 +33,8 @@ class SkillLoader:
     def __init__(self, skills_dir: str):
         self.skills_dir = skills_dir
         self._cache: Dict[str, SkillConfig] = {}
+        self._matchers: Dict[str, Optional[re.Pattern]] = {}
+        self._stage_prompts: Dict[str, str] = {}
         self._load_all_skills()
     
     def _load_all_skills(self):
@@ -87,15 +90,28 @@ class SkillLoader:
         """Get main daily flow orchestration."""
         return self.get_skill('reflection/daily_flow')
     
+    def _keyword_matcher(self, name: str, keywords: List[str]) -> Optional[re.Pattern]:
+        """
+        Compile a keyword list into one alternation so a scan is a single pass
+        over the text. Cached per list name; None when there are no keywords.
+        """
+        if name not in self._matchers:
+            self._matchers[name] = (
+                re.compile('|'.join(re.escape(k.lower()) for k in keywords))
+                if keywords else None
+            )
+        return self._matchers[name]
+    
     def check_physical_sensation_triggers(self, text: str) -> bool:
         """Check if text contains physical sensation triggers that warrant grounding offer."""
         observation = self.get_stage_config('observation')
         if not observation:
             return False
         
-        triggers = observation.get('physical_sensation_triggers', [])
-        text_lower = text.lower()
-        return any(trigger.lower() in text_lower for trigger in triggers)
+        matcher = self._keyword_matcher(
+            'physical_sensation_triggers', observation.get('physical_sensation_triggers', [])
+        )
+        return bool(matcher and matcher.search(text.lower()))
     
     def check_experiment_readiness_signals(self, text: str) -> bool:
         """Check if user is signaling readiness for experiment."""
@@ -103,9 +119,8 @@ class SkillLoader:
         if not guard:
             return False
         
-        signals = guard.get('entry_signals', [])
-        text_lower = text.lower()
-        return any(signal.lower() in text_lower for signal in signals)
+        matcher = self._keyword_matcher('entry_signals', guard.get('entry_signals', []))
+        return bool(matcher and matcher.search(text.lower()))
     
     def get_experiment_limit_message(self, active_count: int, experiments: List[Any] = None) -> Optional[str]:
         """Get appropriate message based on active experiment count."""
@@ -124,7 +139,12 @@ class SkillLoader:
             return msg.format(count=active_count) if msg else None
     
     def build_stage_prompt_context(self, stage: str) -> str:
-        """Build prompt context for a specific stage."""
+        """Build prompt context for a specific stage (memoized; skills load once)."""
+        if stage not in self._stage_prompts:
+            self._stage_prompts[stage] = self._build_stage_prompt_context(stage)
+        return self._stage_prompts[stage]
+    
+    def _build_stage_prompt_context(self, stage: str) -> str:
         config = self.get_stage_config(stage)
         if not config:
             return ""
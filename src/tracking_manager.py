@@ -11,9 +11,9 @@ Supports bidirectional updates (reflections can reshape goals/habits).
 """
 
 import os
-import json
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+from . import json_utils
 from .tracking_schema import TargetGoal, Habit, Experiment, ProgressEntry
 
 
@@ -38,32 +38,45 @@ class TrackingManager:
         self._habits: Dict[str, Habit] = {}
         self._experiments: Dict[str, Experiment] = {}
         
+        # Derived views: reset on every write to their file, rebuilt on next read
+        self._active_goals: Optional[List[TargetGoal]] = None
+        self._active_habits: Optional[List[Habit]] = None
+        self._habits_by_goal: Optional[Dict[str, List[Habit]]] = None
+        self._active_experiments: Optional[List[Experiment]] = None
+        
         # Load existing data
         self._load_all()
     
     # ==================== PERSISTENCE ====================
     
-    def _load_jsonl(self, filepath: str) -> List[Dict[str, Any]]:
-        """Load all entries from a JSONL file."""
-        entries = []
+    def _iter_jsonl(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """Yield entries from a JSONL file one line at a time."""
         if os.path.exists(filepath):
             with open(filepath, 'r', encoding='utf-8') as f:
                 for line in f:
                     line = line.strip()
                     if line:
-                        entries.append(json.loads(line))
-        return entries
+                        yield json_utils.loads(line)
+
+    def _load_jsonl(self, filepath: str) -> List[Dict[str, Any]]:
+        """Load all entries from a JSONL file."""
+        return list(self._iter_jsonl(filepath))
     
     def _append_jsonl(self, filepath: str, data: Dict[str, Any]):
         """Append a single entry to a JSONL file."""
         with open(filepath, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(data) + '\n')
+            f.write(json_utils.dumps(data) + '\n')
+    
+    def _append_jsonl_many(self, filepath: str, entries: List[Dict[str, Any]]):
+        """Append several entries to a JSONL file in one write."""
+        with open(filepath, 'a', encoding='utf-8') as f:
+            f.write(''.join(json_utils.dumps(entry) + '\n' for entry in entries))
     
     def _rewrite_jsonl(self, filepath: str, entries: List[Dict[str, Any]]):
         """Rewrite entire JSONL file (for updates)."""
         with open(filepath, 'w', encoding='utf-8') as f:
             for entry in entries:
-                f.write(json.dumps(entry) + '\n')
+                f.write(json_utils.dumps(entry) + '\n')
     
     def _load_all(self):
         """Load all data from JSONL files into memory."""
@@ -84,16 +97,19 @@ class TrackingManager:
     
     def _save_goals(self):
         """Save all goals to JSONL."""
+        self._active_goals = None
         entries = [g.to_dict() for g in self._goals.values()]
         self._rewrite_jsonl(self.goals_file, entries)
     
     def _save_habits(self):
         """Save all habits to JSONL."""
+        self._active_habits = self._habits_by_goal = None
         entries = [h.to_dict() for h in self._habits.values()]
         self._rewrite_jsonl(self.habits_file, entries)
     
     def _save_experiments(self):
         """Save all experiments to JSONL."""
+        self._active_experiments = None
         entries = [e.to_dict() for e in self._experiments.values()]
         self._rewrite_jsonl(self.experiments_file, entries)
     
@@ -108,6 +124,7 @@ class TrackingManager:
             target_date=target_date
         )
         self._goals[goal.id] = goal
+        self._active_goals = None
         self._append_jsonl(self.goals_file, goal.to_dict())
         return goal
     
@@ -117,7 +134,9 @@ class TrackingManager:
     
     def get_active_goals(self) -> List[TargetGoal]:
         """Get all active goals."""
-        return [g for g in self._goals.values() if g.status == "active"]
+        if self._active_goals is None:
+            self._active_goals = [g for g in self._goals.values() if g.status == "active"]
+        return list(self._active_goals)
     
     def update_goal(self, goal_id: str, **kwargs) -> Optional[TargetGoal]:
         """
@@ -172,6 +191,7 @@ class TrackingManager:
             components=components or []
         )
         self._habits[habit.id] = habit
+        self._active_habits = self._habits_by_goal = None
         self._append_jsonl(self.habits_file, habit.to_dict())
         
         # Link to goal if specified
@@ -180,17 +200,63 @@ class TrackingManager:
         
         return habit
     
+    def create_habits_bulk(self, habits: List[Dict[str, Any]],
+                           goal_id: Optional[str] = None) -> List[Habit]:
+        """
+        Create several habits at once, optionally linked to a goal.
+        Each dict has `title` and optional `description` and `components`.
+        Writes the habits file and the goals file once rather than per habit.
+        """
+        created = [
+            Habit(
+                title=h['title'],
+                description=h.get('description', ''),
+                goal_id=goal_id,
+                components=h.get('components') or []
+            )
+            for h in habits
+        ]
+        if not created:
+            return created
+        for habit in created:
+            self._habits[habit.id] = habit
+        self._active_habits = self._habits_by_goal = None
+        self._append_jsonl_many(self.habits_file, [h.to_dict() for h in created])
+        
+        goal = self._goals.get(goal_id) if goal_id else None
+        if goal:
+            goal.habits.extend(h.id for h in created if h.id not in goal.habits)
+            goal.last_updated = datetime.now().isoformat()
+            self._save_goals()
+        
+        return created
+    
     def get_habit(self, habit_id: str) -> Optional[Habit]:
         """Get a habit by ID."""
         return self._habits.get(habit_id)
     
     def get_habits_for_goal(self, goal_id: str) -> List[Habit]:
         """Get all habits linked to a goal."""
-        return [h for h in self._habits.values() if h.goal_id == goal_id]
+        return list(self._get_habits_by_goal().get(goal_id, []))
+    
+    def get_habit_counts(self) -> Dict[str, int]:
+        """Get {goal_id: number of habits} for every goal with habits."""
+        return {goal_id: len(habits) for goal_id, habits in self._get_habits_by_goal().items()}
+    
+    def _get_habits_by_goal(self) -> Dict[str, List[Habit]]:
+        """Habits grouped by goal_id, built in one pass and reused until habits change."""
+        if self._habits_by_goal is None:
+            grouped: Dict[str, List[Habit]] = {}
+            for h in self._habits.values():
+                grouped.setdefault(h.goal_id, []).append(h)
+            self._habits_by_goal = grouped
+        return self._habits_by_goal
     
     def get_active_habits(self) -> List[Habit]:
         """Get habits that are being developed."""
-        return [h for h in self._habits.values() if h.status == "developing"]
+        if self._active_habits is None:
+            self._active_habits = [h for h in self._habits.values() if h.status == "developing"]
+        return list(self._active_habits)
     
     def update_habit(self, habit_id: str, **kwargs) -> Optional[Habit]:
         """
@@ -251,6 +317,7 @@ class TrackingManager:
             related_graph_nodes=related_graph_nodes or []
         )
         self._experiments[exp.id] = exp
+        self._active_experiments = None
         self._append_jsonl(self.experiments_file, exp.to_dict())
         
         # Link to habit if specified
@@ -269,8 +336,10 @@ class TrackingManager:
     
     def get_active_experiments(self) -> List[Experiment]:
         """Get experiments that are active or testing."""
-        return [e for e in self._experiments.values() 
-                if e.status in ("active", "testing")]
+        if self._active_experiments is None:
+            self._active_experiments = [e for e in self._experiments.values() 
+                                        if e.status in ("active", "testing")]
+        return list(self._active_experiments)
     
     def get_experiments_needing_followup(self) -> List[Experiment]:
         """
@@ -506,6 +575,38 @@ if __name__ == "__main__":
         assert "Emotionally regulated" in summary, "Summary missing goal"
         print("  ✓ Overall progress summary")
         
+        # Test active experiment cache follows writes
+        assert [e.id for e in tm.get_active_experiments()] == [exp.id]
+        extra = tm.create_experiment(title="Cold shower")
+        assert len(tm.get_active_experiments()) == 2, "Cache missed new experiment"
+        tm.complete_experiment(extra.id)
+        assert [e.id for e in tm.get_active_experiments()] == [exp.id], "Cache kept completed experiment"
+        print("  ✓ Active experiment cache")
+        
+        # Test goal/habit views follow writes
+        other_goal = tm.create_goal(title="Sleep well")
+        assert len(tm.get_active_goals()) == 2, "Cache missed new goal"
+        tm.create_habit(title="No screens after 10pm", goal_id=other_goal.id)
+        assert [h.title for h in tm.get_habits_for_goal(other_goal.id)] == ["No screens after 10pm"]
+        assert len(tm.get_active_habits()) == 2, "Cache missed new habit"
+        assert tm.get_habit_counts().get(other_goal.id) == 1, "Habit count wrong"
+        tm.delete_goal(other_goal.id)
+        assert len(tm.get_active_goals()) == 1 and tm.get_habits_for_goal(other_goal.id) == []
+        assert len(tm.get_active_habits()) == 1, "Cache kept deleted habit"
+        print("  ✓ Goal and habit caches")
+        
+        # Test bulk habit creation
+        bulk = tm.create_habits_bulk(
+            [{"title": "Plan tomorrow"}, {"title": "Review inbox", "components": ["triage"]}],
+            goal_id=goal.id
+        )
+        assert [h.title for h in bulk] == ["Plan tomorrow", "Review inbox"]
+        assert all(h.id in tm.get_goal(goal.id).habits for h in bulk), "Bulk habits not linked"
+        tm2 = TrackingManager(base_dir=test_dir)
+        assert {h.title for h in tm2.get_habits_for_goal(goal.id)} >= {"Plan tomorrow", "Review inbox"}
+        assert tm2.get_habit(bulk[1].id).components == ["triage"], "Bulk habits not persisted"
+        print("  ✓ Bulk habit creation")
+        
         print("\nAll tracking_manager tests passed! ✓")
     else:
         print("Usage: python tracking_manager.py --test")